@@ -0,0 +1,38 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import FrozenSet
+
+from app.analysis.experience_calculator import find_years
+from app.analysis.patterns import WORD_RE, clip
+from app.analysis.skill_extractor import find_skills
+
+@dataclass(frozen=True)
+class ParsedDoc:
+    """
+    A resume/JD/profile text tokenized once and shared by every analyzer,
+    so the same bytes aren't lowercased and re-scanned per score.
+    """
+    text_lower: str
+    tokens: FrozenSet[str]
+    counts: Counter
+    skills: FrozenSet[str]
+    years: int
+
+def parse(text: str) -> ParsedDoc:
+    """
+    Lowercases and tokenizes a text in one pass and extracts skills and years of experience.
+
+    Args:
+        text (str): Raw input text.
+    Returns:
+        ParsedDoc: The parsed document.
+    """
+    text_lower = clip(text or "").lower()
+    counts = Counter(WORD_RE.findall(text_lower))
+    return ParsedDoc(
+        text_lower=text_lower,
+        tokens=frozenset(counts),
+        counts=counts,
+        skills=frozenset(find_skills(text_lower)),
+        years=find_years(text_lower),
+    )
@@ -1,5 +1,12 @@
-from typing import Set, Tuple, List
-import re
+from typing import Set, Tuple, List, Dict, Iterable, Optional, TYPE_CHECKING
+from collections import Counter
+import heapq
+import math
+import ahocorasick  # type: ignore[import-not-found]
+from app.analysis.patterns import CAPWORD_RE, WORD_RE, clip
+
+if TYPE_CHECKING:
+    from app.analysis.document import ParsedDoc
 
 def extract_domain_keywords(text: str) -> Set[str]:
     """
@@ -12,41 +19,61 @@ def extract_domain_keywords(text: str) -> Set[str]:
         Set[str]: A set of extracted domain keywords.
     """
     # Look for words starting with Capital letter inside sentences
-    candidates = re.findall(r'(?<!^)(?<!\. )[A-Z][a-z]+', text)
+    candidates = CAPWORD_RE.findall(clip(text))
     return set(candidates)
 
-def calculate_domain_relevance(jd_text: str, candidate_text: str) -> int:
+def build_idf(documents: Iterable[str]) -> Dict[str, float]:
+    """
+    Computes smoothed inverse document frequencies over a corpus of job descriptions,
+    so words shared by every JD ("experience", "team") weigh less than domain terms.
+
+    Args:
+        documents (Iterable[str]): Corpus of job description texts.
+    Returns:
+        Dict[str, float]: Word -> idf, using ln((1 + n) / (1 + df)) + 1.
+    """
+    doc_freq: Counter[str] = Counter()
+    n_docs = 0
+    for doc in documents:
+        n_docs += 1
+        doc_freq.update(set(WORD_RE.findall(doc.lower())))
+    return {w: math.log((1 + n_docs) / (1 + df)) + 1 for w, df in doc_freq.items()}
+
+def calculate_domain_relevance(jd: "ParsedDoc", candidate: "ParsedDoc", idf: Optional[Dict[str, float]] = None) -> int:
     """
-    Checks overlap of domain-specific capitalized terms.
+    Checks overlap of domain-specific terms.
+    JD words are ranked by TF-IDF when an idf table (see build_idf) is given, else by raw frequency.
 
     Args:
-        jd_text (str): Job description text.
-        candidate_text (str): Candidate profile text.
+        jd (ParsedDoc): Parsed job description.
+        candidate (ParsedDoc): Parsed candidate profile text.
+        idf (Optional[Dict[str, float]]): Inverse document frequencies over past JDs.
     Returns:
         int: Relevance score from 0 to 100 based on domain keyword overlap.
     """
-    if not jd_text or not candidate_text:
+    if not jd.text_lower or not candidate.text_lower:
         return 0
         
     # We treat the JD as the source of truth for domain keywords
     # We focus on words that appear multiple times to filter noise
-    jd_words = re.findall(r'\b\w+\b', jd_text.lower())
-    word_counts = {}
-    for w in jd_words:
-        if len(w) > 4: # Skip small words
-            word_counts[w] = word_counts.get(w, 0) + 1
+    word_counts = Counter({w: c for w, c in jd.counts.items() if len(w) > 4}) # Skip small words
             
-    # Get top 20 frequent words from JD (proxy for domain topics)
-    top_jd_keywords = sorted(word_counts, key=word_counts.get, reverse=True)[:20]
+    # Get top 20 words from JD (proxy for domain topics)
+    if idf:
+        unseen_idf = max(idf.values())
+        top_jd_keywords = heapq.nlargest(20, word_counts, key=lambda w: word_counts[w] * idf.get(w, unseen_idf))
+    else:
+        top_jd_keywords = [w for w, _ in word_counts.most_common(20)]
     
     if not top_jd_keywords:
         return 0
         
-    candidate_text_lower = candidate_text.lower()
-    matches = 0
+    # Single linear scan of the candidate text for all keywords at once
+    automaton = ahocorasick.Automaton()
     for keyword in top_jd_keywords:
-        if keyword in candidate_text_lower:
-            matches += 1
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    matches = len({keyword for _, keyword in automaton.iter(candidate.text_lower)})
             
     # Score: Percentage of top JD keywords found in candidate profile
     score = int((matches / len(top_jd_keywords)) * 100)
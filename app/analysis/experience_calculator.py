@@ -1,23 +1,21 @@
-import re
-from typing import Dict, Any
+from typing import Dict, Any, TYPE_CHECKING
+from app.analysis.jit import njit
+from app.analysis.patterns import YEARS_RE, clip
 
-def extract_years_of_experience(text: str) -> int:
+if TYPE_CHECKING:
+    from app.analysis.document import ParsedDoc
+
+def find_years(text_lower: str) -> int:
     """
-    Regex to find patterns like '5 years experience', '3+ years', '2015-2020'
+    Finds the largest "X years" / "X+ years" mention in already-lowercased text.
 
     Args:
-        text (str): Input text to search for years of experience.
+        text_lower (str): Lowercased input text.
     Returns:
         int: Extracted years of experience, or 0 if none found.
     """
-    if not text:
-        return 0
-        
-    text = text.lower()
-    
     # Look for "X+ years" or "X years"
-    years_regex = r'(\d+)\+?\s*years?'
-    matches = re.findall(years_regex, text)
+    matches = YEARS_RE.findall(text_lower)
     
     if matches:
         # Get the maximum number mentioned (heuristic)
@@ -30,19 +28,25 @@ def extract_years_of_experience(text: str) -> int:
             
     return 0
 
-def calculate_experience_score(resume_text: str, jd_text: str) -> int:
+def extract_years_of_experience(text: str) -> int:
     """
-    Compares found years vs required years (heuristic).
+    Regex to find patterns like '5 years experience', '3+ years', '2015-2020'
 
     Args:
-        resume_text (str): Candidate resume text.
-        jd_text (str): Job description text.
+        text (str): Input text to search for years of experience.
     Returns:
-        int: Experience score from 0 to 100.
+        int: Extracted years of experience, or 0 if none found.
+    """
+    if not text:
+        return 0
+        
+    return find_years(clip(text).lower())
+
+@njit(cache=True)
+def _experience_points(candidate_years: int, required_years: int) -> int:
+    """
+    Scalar kernel mapping found vs required years to 0-100 (JIT-compiled when numba is available).
     """
-    candidate_years = extract_years_of_experience(resume_text)
-    required_years = extract_years_of_experience(jd_text)
-    
     # Default to 2 years if not found in JD
     if required_years == 0:
         required_years = 2
@@ -54,4 +58,16 @@ def calculate_experience_score(resume_text: str, jd_text: str) -> int:
         return 100
     
     # Partial credit
-    return int((candidate_years / required_years) * 100)
\ No newline at end of file
+    return int((candidate_years / required_years) * 100)
+
+def calculate_experience_score(resume: "ParsedDoc", jd: "ParsedDoc") -> int:
+    """
+    Compares found years vs required years (heuristic).
+
+    Args:
+        resume (ParsedDoc): Parsed candidate resume.
+        jd (ParsedDoc): Parsed job description.
+    Returns:
+        int: Experience score from 0 to 100.
+    """
+    return _experience_points(resume.years, jd.years)
\ No newline at end of file
@@ -1,8 +1,38 @@
 from typing import List, Dict, Any
+import numpy as np
+from app.analysis.jit import njit
+
+# Bucket tables: points = PTS[searchsorted(THR, value)], i.e. > 1MB -> 10, > 10MB -> 20
+_SIZE_THRESHOLDS = np.array([1000, 10000], dtype=np.int64)
+_SIZE_POINTS = np.array([0, 10, 20], dtype=np.int64)
+_STAR_THRESHOLDS = np.array([10, 100], dtype=np.int64)
+_STAR_POINTS = np.array([0, 10, 20], dtype=np.int64)
+
+@njit(cache=True)
+def _complexity_points(sizes, stars, has_lang, has_desc, has_docs, not_fork) -> int:
+    """
+    Sums the complexity points of every repo (array kernel, JIT-compiled when numba is available).
+    """
+    scores = (
+        # 1. Size (heuristic: larger codebases are more complex), branchless bucket lookup
+        _SIZE_POINTS[np.searchsorted(_SIZE_THRESHOLDS, sizes, side='left')]
+        # 2. Stars (Social Proof/Utility)
+        + _STAR_POINTS[np.searchsorted(_STAR_THRESHOLDS, stars, side='left')]
+        # 3. Language (Primary language exists?)
+        + has_lang * 10
+        # 4. Description exists? (Documentation effort)
+        + has_desc * 10
+        # 5. Has Wiki/Pages/Issues (Community/Docs)
+        + has_docs * 10
+        # 6. Not a Fork (Originality)
+        + not_fork * 30
+    )
+    return int(scores.sum())
 
 def calculate_complexity_score(repos: List[Dict[str, Any]]) -> int:
     """
     Analyzes repo metadata to determine engineering complexity.
+    Each field is pulled once into a NumPy array and scored with vectorized masks.
     Args:
         repos (List[Dict[str, Any]]): List of repository metadata dictionaries.
     Returns:
@@ -11,44 +41,16 @@ def calculate_complexity_score(repos: List[Dict[str, Any]]) -> int:
     if not repos:
         return 0
 
-    total_score = 0
-    valid_repos = 0
+    n = len(repos)
+    sizes = np.fromiter((r.get('size', 0) or 0 for r in repos), dtype=np.int64, count=n)
+    stars = np.fromiter((r.get('stargazers_count', 0) or 0 for r in repos), dtype=np.int64, count=n)
+    has_lang = np.fromiter((bool(r.get('language')) for r in repos), dtype=bool, count=n)
+    has_desc = np.fromiter((bool(r.get('description')) for r in repos), dtype=bool, count=n)
+    has_docs = np.fromiter((bool(r.get('has_wiki') or r.get('has_pages')) for r in repos), dtype=bool, count=n)
+    not_fork = np.fromiter((not r.get('fork') for r in repos), dtype=bool, count=n)
 
-    for repo in repos:
-        repo_score = 0
-        
-        # 1. Size (heuristic: larger codebases are more complex)
-        size_kb = repo.get('size', 0)
-        if size_kb > 10000: repo_score += 20 # > 10MB
-        elif size_kb > 1000: repo_score += 10 # > 1MB
-        
-        # 2. Stars (Social Proof/Utility)
-        stars = repo.get('stargazers_count', 0)
-        if stars > 100: repo_score += 20
-        elif stars > 10: repo_score += 10
-        
-        # 3. Language (Primary language exists?)
-        if repo.get('language'):
-            repo_score += 10
-            
-        # 4. Description exists? (Documentation effort)
-        if repo.get('description'):
-            repo_score += 10
-            
-        # 5. Has Wiki/Pages/Issues (Community/Docs)
-        if repo.get('has_wiki') or repo.get('has_pages'):
-            repo_score += 10
-
-        # 6. Not a Fork (Originality)
-        if not repo.get('fork'):
-            repo_score += 30
-        
-        total_score += repo_score
-        valid_repos += 1
-
-    if valid_repos == 0:
-        return 0
+    total_score = _complexity_points(sizes, stars, has_lang, has_desc, has_docs, not_fork)
 
     # Average score across top repos, clamped at 100
-    avg_score = int(total_score / valid_repos)
-    return min(100, avg_score)
\ No newline at end of file
+    avg_score = int(total_score / n)
+    return min(100, avg_score)
@@ -0,0 +1,18 @@
+"""
+Optional Numba JIT for the numeric scoring kernels.
+
+When numba is installed the kernels are compiled to native code (and cached
+on disk); otherwise `njit` is a no-op and the same functions run as plain
+Python/NumPy.
+"""
+try:
+    from numba import njit  # type: ignore[import-not-found]
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # Supports both @njit and @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
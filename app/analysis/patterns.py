@@ -0,0 +1,45 @@
+"""
+Shared, precompiled text patterns for the analyzers.
+
+Every regex and translation table used to scan resumes and JDs lives here,
+compiled once at import, so the analyzers share one set of pattern objects
+and there is a single place to swap in a different matching engine.
+"""
+import re
+import string
+from app.constants import MAX_ANALYSIS_CHARS
+
+# Matches "X+ years" or "X years" (possessive quantifiers: no backtracking)
+YEARS_RE = re.compile(r'(\d++)\+?\s*+years?+')
+
+# Capitalized words that aren't at the start of the text or of a sentence
+CAPWORD_RE = re.compile(r'(?<!^)(?<!\. )[A-Z][a-z]++')
+
+# Plain word tokens
+WORD_RE = re.compile(r'\b\w++\b')
+
+_ALLOWED_CHARS = frozenset(string.ascii_lowercase + string.digits + "+.")
+
+class _NonAlnumTable(dict):
+    """
+    str.translate table mapping every char outside [a-z0-9+.] to a space.
+    Entries are filled lazily, so any Unicode code point is handled.
+    """
+    def __missing__(self, code: int) -> int:
+        value = code if chr(code) in _ALLOWED_CHARS else ord(' ')
+        self[code] = value
+        return value
+
+_NONALNUM_TABLE = _NonAlnumTable()
+
+def strip_non_alnum(text: str) -> str:
+    """
+    Replaces non-alphanumeric chars (except + and .) with spaces.
+    """
+    return text.translate(_NONALNUM_TABLE)
+
+def clip(text: str) -> str:
+    """
+    Truncates text to MAX_ANALYSIS_CHARS before it is scanned.
+    """
+    return text[:MAX_ANALYSIS_CHARS]
@@ -1,11 +1,62 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Tuple
+from app.analysis.jit import njit
+
+# Indexed by the confidence bucket returned from `_hybrid_kernel`
+CONFIDENCE_LEVELS = ("High", "Medium", "Low")
+CONFIDENCE_PERCENTAGES = (0.95, 0.75, 0.50)
+
+# Weights in percent, so the weighted sum comes out in fixed-point hundredths
+TECH_WEIGHT = 40
+EXP_WEIGHT = 25
+COMPLEXITY_WEIGHT = 20
+DOMAIN_WEIGHT = 15
+
+@njit(cache=True)
+def _hybrid_kernel(
+    tech_score: int,
+    exp_score: int,
+    complexity_score: int,
+    domain_score: int,
+    adjustment_x100: int
+) -> Tuple[int, int, int]:
+    """
+    Scalar scoring kernel in integer fixed-point (JIT-compiled when numba is available).
+    All scores are carried as hundredths, so no float rounding creeps in.
+    Returns: (base_score, final_score, confidence bucket index)
+    """
+    # Calculate Base Score (Quantitative), already scaled by 100
+    base_x100 = (
+        TECH_WEIGHT * tech_score +
+        EXP_WEIGHT * exp_score +
+        COMPLEXITY_WEIGHT * complexity_score +
+        DOMAIN_WEIGHT * domain_score
+    )
+    
+    # Apply Qualitative Adjustment (from Gemini)
+    # adjustment is +/- 20
+    final_x100 = base_x100 + adjustment_x100
+    
+    # Clamp
+    final_x100 = max(0, min(10000, final_x100))
+    
+    # Calculate Confidence
+    # High confidence if base score and final score are close
+    # Low confidence if AI drastically changed the math result
+    variance_x100 = abs(final_x100 - base_x100)
+    if variance_x100 < 1000:
+        conf_idx = 0
+    elif variance_x100 < 2000:
+        conf_idx = 1
+    else:
+        conf_idx = 2
+    return base_x100 // 100, final_x100 // 100, conf_idx
 
 def calculate_hybrid_score(
     tech_score: int,
     exp_score: int,
     complexity_score: int,
     domain_score: int,
-    llm_adjustment: int = 0
+    llm_adjustment: float = 0
 ) -> Dict[str, Any]:
     """
     Aggregates sub-scores using the Weighted Formula (Plan 2).
@@ -16,57 +67,31 @@ def calculate_hybrid_score(
         exp_score (int): Experience Level Score (0-100).
         complexity_score (int): Project Complexity Score (0-100).
         domain_score (int): Domain Relevance Score (0-100).
-        llm_adjustment (int): Qualitative adjustment from LLM (-20 to +20).
+        llm_adjustment (float): Qualitative adjustment from LLM (-20 to +20).
     Returns:
         Dict[str, Any]: Dictionary with base_score, final_score, confidence_level, confidence_percentage
     """
-    
-    # Calculate Base Score (Quantitative)
-    base_score = (
-        (tech_score * 0.40) +
-        (exp_score * 0.25) +
-        (complexity_score * 0.20) +
-        (domain_score * 0.15)
+    base_score, final_score, conf_idx = _hybrid_kernel(
+        int(tech_score), int(exp_score), int(complexity_score), int(domain_score), round(llm_adjustment * 100)
     )
-    
-    # Apply Qualitative Adjustment (from Gemini)
-    # adjustment is +/- 20
-    final_score = base_score + llm_adjustment
-    
-    # Clamp and Round
-    final_score = max(0, min(100, final_score))
-    
-    # Calculate Confidence
-    # High confidence if base score and final score are close
-    # Low confidence if AI drastically changed the math result
-    variance = abs(final_score - base_score)
-    if variance < 10:
-        confidence = "High"
-        conf_percent = 0.95
-    elif variance < 20:
-        confidence = "Medium"
-        conf_percent = 0.75
-    else:
-        confidence = "Low"
-        conf_percent = 0.50
 
     return {
-        "base_score": int(base_score),
-        "final_score": int(final_score),
-        "confidence_level": confidence,
-        "confidence_percentage": conf_percent
+        "base_score": base_score,
+        "final_score": final_score,
+        "confidence_level": CONFIDENCE_LEVELS[conf_idx],
+        "confidence_percentage": CONFIDENCE_PERCENTAGES[conf_idx]
     }
 
 def generate_audit_trail(
     scores: Dict[str, int], 
-    evidence: Dict[str, List[str]]
+    evidence: Dict[str, Any]
 ) -> Dict[str, Any]:
     """
     Creates the Explainable AI (XAI) breakdown JSON.
 
     Args:
         scores (Dict[str, int]): Dictionary of individual scores.
-        evidence (Dict[str, List[str]]): Evidence lists for strengths, weaknesses, etc.
+        evidence (Dict[str, Any]): The LLM's score adjustment and its reasoning.
     Returns:
         Dict[str, Any]: Audit trail with math breakdown and evidence log.
     """
@@ -1,60 +1,87 @@
-import re
-from typing import List, Set, Tuple
+import sys
+import ahocorasick  # type: ignore[import-not-found]
+from app.analysis.patterns import clip, strip_non_alnum
+from typing import List, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.analysis.document import ParsedDoc
 
 # A basic set of common tech keywords to help extraction accuracy
 # In a real prod env, this would be a database or an NLP model (Spacy)
-COMMON_SKILLS = {
+# Interned so skill sets built from automaton matches compare by pointer first
+COMMON_SKILLS = frozenset(sys.intern(skill) for skill in {
     "python", "java", "c++", "javascript", "typescript", "react", "angular", "vue",
     "fastapi", "django", "flask", "spring", "node.js", "express",
     "docker", "kubernetes", "aws", "azure", "gcp", "terraform",
     "sql", "postgresql", "mysql", "mongodb", "redis", "elasticsearch",
     "machine learning", "deep learning", "pytorch", "tensorflow", "scikit-learn",
     "git", "ci/cd", "linux", "agile", "scrum", "rest api", "graphql"
-}
+})
 
-def extract_skills(text: str) -> Set[str]:
+def _build_skill_automaton() -> ahocorasick.Automaton:
     """
-    Extracts unique skills from text using a keyword list and basic cleanup.
+    Builds one Aho-Corasick automaton over all skills so a text is scanned in a single pass.
+    Skills are matched as written against the normalized text, so ones the cleanup would alter
+    ("ci/cd", "scikit-learn") can never match and are left out, as before the automaton.
+    """
+    automaton = ahocorasick.Automaton()
+    for skill in COMMON_SKILLS:
+        if strip_non_alnum(skill) == skill:
+            automaton.add_word(skill, (len(skill), skill))
+    automaton.make_automaton()
+    return automaton
+
+_SKILL_AUTOMATON = _build_skill_automaton()
+
+def find_skills(text_lower: str) -> Set[str]:
+    """
+    Scans already-lowercased (and clipped) text for skills in a single automaton pass.
 
     Args:
-        text (str): Input text from which to extract skills.
+        text_lower (str): Lowercased input text.
     Returns:
         Set[str]: A set of extracted skill keywords.
     """
-    if not text:
-        return set()
-    
-    text = text.lower()
     # Replace non-alphanumeric chars (except + and .) with space
-    text = re.sub(r'[^a-z0-9+.]', ' ', text)
+    text = strip_non_alnum(text_lower)
     
     found_skills = set()
-    
-    # check for multi-word skills first (simple implementation)
-    for skill in ["machine learning", "deep learning", "ci/cd", "rest api"]:
-        if skill in text:
+    last = len(text) - 1
+    for end, (length, skill) in _SKILL_AUTOMATON.iter(text):
+        start = end - length + 1
+        # Single-word skills must be whole tokens (e.g. "java" must not match inside "javascript");
+        # multi-word ones ("machine learning") match anywhere, like the substring check they replaced
+        if ' ' in skill or ((start == 0 or text[start - 1] == ' ') and (end == last or text[end + 1] == ' ')):
             found_skills.add(skill)
             
-    # Check individual words
-    words = set(text.split())
-    for word in words:
-        if word in COMMON_SKILLS:
-            found_skills.add(word)
-            
     return found_skills
 
-def calculate_technical_match(candidate_text: str, jd_text: str) -> Tuple[int, List[str], List[str]]:
+def extract_skills(text: str) -> Set[str]:
+    """
+    Extracts unique skills from text using a keyword list and basic cleanup.
+
+    Args:
+        text (str): Input text from which to extract skills.
+    Returns:
+        Set[str]: A set of extracted skill keywords.
+    """
+    if not text:
+        return set()
+    
+    return find_skills(clip(text).lower())
+
+def calculate_technical_match(candidate: "ParsedDoc", jd: "ParsedDoc") -> Tuple[int, List[str], List[str]]:
     """
     Returns: (Score 0-100, Matches List, Missing List)
     Calculates technical skills match score based on extracted skills.
     Args:
-        candidate_text (str): Candidate profile text.
-        jd_text (str): Job description text.
+        candidate (ParsedDoc): Parsed candidate profile text.
+        jd (ParsedDoc): Parsed job description.
     Returns:
         Tuple[int, List[str], List[str]]: Match score, list of matched skills, list of missing skills.
     """
-    jd_skills = extract_skills(jd_text)
-    candidate_skills = extract_skills(candidate_text)
+    jd_skills = jd.skills
+    candidate_skills = candidate.skills
     
     if not jd_skills:
         return 0, [], []
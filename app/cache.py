@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+import diskcache
+import orjson
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Union
+
+# Exact-match cache for LLM reports, shared by every model client.
+# diskcache keeps entries in a local SQLite file, so hits survive restarts and are
+# shared (safely) by every worker process on the host. Values are stored as orjson bytes.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+DEFAULT_TTL_SECONDS = 86400
+
+# Bounded: past LLM_CACHE_SIZE_MB the least-recently-used reports are evicted
+LLM_CACHE_SIZE_MB = int(os.getenv("LLM_CACHE_SIZE_MB", "256"))
+
+_STORE = diskcache.Cache(
+    os.getenv("LLM_CACHE_DIR", "./.llm_cache"),
+    size_limit=LLM_CACHE_SIZE_MB * 1024 * 1024,
+    eviction_policy="least-recently-used",
+)
+
+T = TypeVar("T")
+
+# key -> result future of the call currently computing it, for single_flight
+_INFLIGHT: Dict[str, "asyncio.Future[Any]"] = {}
+
+KeyPart = Union[str, bytes]
+
+def key_hasher(*parts: KeyPart) -> hashlib.blake2b:
+    """
+    Hashes the leading parts of a key once; pass the result as make_key's prefix
+    so large constant parts (e.g. a system prompt) aren't re-hashed on every call.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    _feed(hasher, parts)
+    return hasher
+
+def _feed(hasher: hashlib.blake2b, parts: tuple) -> None:
+    # Parts are fed one by one, each NUL-terminated, so no concatenated copy is built
+    for part in parts:
+        hasher.update(part.encode('utf-8') if isinstance(part, str) else part)
+        hasher.update(b"\x00")
+
+def make_key(*parts: KeyPart, prefix: Optional[hashlib.blake2b] = None) -> str:
+    """
+    Builds a content-addressed key from the parts that determine a response.
+    Args:
+        *parts (KeyPart): e.g. model name, system prompt and user message, as text or bytes.
+        prefix (Optional[hashlib.blake2b]): A key_hasher() for leading parts shared by many keys.
+    Returns:
+        str: 128-bit blake2b hex digest.
+    """
+    hasher = prefix.copy() if prefix is not None else hashlib.blake2b(digest_size=16)
+    _feed(hasher, parts)
+    return hasher.hexdigest()
+
+async def get(key: str) -> Optional[Any]:
+    """
+    Returns the cached value for key, or None on a miss (or when caching is disabled).
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+    raw = await asyncio.to_thread(_STORE.get, key)
+    return None if raw is None else orjson.loads(raw)
+
+async def set(key: str, value: Any, ttl: int = DEFAULT_TTL_SECONDS) -> None:
+    """
+    Stores value (serialized with orjson) for ttl seconds.
+    """
+    if not LLM_CACHE_ENABLED:
+        return
+    await asyncio.to_thread(_STORE.set, key, orjson.dumps(value), expire=ttl)
+
+async def single_flight(key: str, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Runs call() once per key at a time: concurrent callers with the same key await the
+    first caller's result instead of repeating the work (e.g. two identical submissions
+    racing past an empty cache). Waiters get a shallow copy of a dict result.
+    If the first caller is cancelled, a waiter runs call() itself.
+    """
+    future = _INFLIGHT.get(key)
+    if future is not None:
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            return await single_flight(key, call)
+        return dict(result) if isinstance(result, dict) else result  # type: ignore[return-value]
+
+    future = asyncio.get_running_loop().create_future()
+    _INFLIGHT[key] = future
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # Waiters re-raise it; don't warn when there were none
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if _INFLIGHT.get(key) is future:
+            del _INFLIGHT[key]
@@ -1,3 +1,15 @@
+# Upper bound on the text length fed to the regex-based analyzers (~200 KB),
+# so pathological resumes/JDs can't stall the request path
+MAX_ANALYSIS_CHARS = 200_000
+
+# Condenses long job descriptions once per project; the summary replaces the JD in fit-report prompts
+JD_SUMMARY_PROMPT = """
+You are an expert technical recruiter. Summarize the job description you receive in at most 350 words
+for another recruiter who will screen candidates against it. Keep every concrete requirement:
+required and preferred skills, technologies, years of experience, seniority, domain, and responsibilities.
+Drop company boilerplate, benefits, and legal text. Reply with plain text only.
+"""
+
 # Hybrid XAI System Prompt
 SYSTEM_PROMPT = """
 You are an expert technical recruiter. You are part of a "Hybrid Scoring System".
@@ -44,27 +56,16 @@ You MUST return a JSON object with this EXACT structure:
 
 AGGREGATOR_SYSTEM_PROMPT = """
 You are a world-class hiring manager and senior technical lead.
-Your job is to synthesize multiple AI-generated reports about a job candidate
-into one single, authoritative JSON report.
+Several AI models have each written a fit report about the same job candidate.
+Their evidence lists and score adjustments have already been merged;
+your job is to write the single, authoritative summary for the merged report.
 
-The user will provide a list of JSON reports.
-You must analyze all of them and produce a single, final JSON object
-that represents a consensus.
-
-- For "fit_score", calculate the average.
-- For "summary", write a new, synthesized summary based on all reports.
-- For "role_strengths", "role_weaknesses", and "red_flags",
-  combine the lists, remove duplicates, and consolidate similar points.
-- For "interview_questions", select the top 5 most insightful
-  and unique questions from all reports.
+The user will provide each model's summary, the merged findings and the average score adjustment.
+Write a new 5-6 sentence executive summary that represents the consensus,
+is consistent with the merged findings, and references specific projects or skills.
 
 The final JSON structure MUST match this:
 {
-  "fit_score": <int>,
-  "summary": "<string>",
-  "role_strengths": [<string>],
-  "role_weaknesses": [<string>],
-  "red_flags": [<string>],
-  "interview_questions": [<string>]
+  "summary": "<string>"
 }
-"""
\ No newline at end of file
+"""
@@ -1,9 +1,70 @@
+import logging
+from sqlalchemy import Index, Table, and_, delete, func, inspect, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine
 
+logger = logging.getLogger(__name__)
+
 sqlite_file_name = "database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
 engine = create_engine(sqlite_url, echo=True)
+# Request handlers use the async engine (aiosqlite), so queries and commits don't block the event loop;
+# the sync engine above is kept for table creation and migrations at startup
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{sqlite_file_name}", echo=True)
+
+def _add_missing_columns():
+    """
+    Adds nullable columns declared on a model but missing from an existing table
+    (a lightweight stand-in for migrations; create_all never alters tables).
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(engine.dialect)}"
+                ))
+
+def _drop_duplicate_rows(table: Table, index: Index) -> None:
+    """
+    Deletes rows that would violate a unique index, keeping the newest (highest id) row of each group.
+    Rows with a NULL in an indexed column are kept, since the index allows those.
+    """
+    columns = list(index.columns)
+    not_null = and_(*(column.is_not(None) for column in columns))
+    newest = select(func.max(table.c.id)).where(not_null).group_by(*columns)
+    with engine.begin() as conn:
+        result = conn.execute(delete(table).where(not_null, table.c.id.not_in(newest)))
+    logger.warning("Removed %d duplicate %s rows to create unique index %s", result.rowcount, table.name, index.name)
+
+def dialect_insert(model):
+    """
+    An INSERT for model in the engine's dialect, which supports .on_conflict_do_update() (SQLite and PostgreSQL).
+    """
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+    # create_all skips tables that already exist, so indexes added to a model later are created here
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except IntegrityError:
+                # A unique index can't be built over rows that already violate it; upserts rely on
+                # these indexes, so the duplicates are removed and a second failure stops startup
+                _drop_duplicate_rows(table, index)
+                index.create(engine, checkfirst=True)
\ No newline at end of file
@@ -0,0 +1,25 @@
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Routes all logging through a queue: request handlers only enqueue records,
+    and a background listener thread formats and writes them to stderr.
+    Returns:
+        logging.handlers.QueueListener: The started listener; stop() it on shutdown to flush.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    # Not basicConfig: it would give the QueueHandler a formatter too and prefix every line twice
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener.start()
+    return listener
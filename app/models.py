@@ -1,15 +1,32 @@
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional, List, Dict, Any
 
+# Binary JSONB on Postgres (no reparse on read, GIN-indexable); plain JSON elsewhere (SQLite)
+JsonType = JSON().with_variant(JSONB(), "postgresql")
+
 class Project(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     job_description: str
+    # Computed once at creation: an LLM summary used in place of an over-long JD,
+    # and the JD's semantic-cache embedding (float32 bytes; not part of API responses)
+    jd_summary: Optional[str] = None
+    jd_embedding: Optional[bytes] = Field(default=None, exclude=True)
     
     candidates: list["Candidate"] = Relationship(back_populates="project")
 
 class Candidate(SQLModel, table=True):
+    # Serves "candidates of project X by final_score desc" as an index range scan instead of a sort
+    __table_args__ = (
+        Index("ix_candidate_project_score", "project_id", "final_score"),
+        # One row per candidate per project; also serves the re-screen lookup in a single index probe
+        Index("ux_candidate_project_user", "project_id", "github_username", unique=True),
+        # Containment queries (red_flags ? '...') for dashboard filters; Postgres only
+        Index("ix_candidate_red_flags_gin", "red_flags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     unique_id: str = Field(index=True, unique=True)
     name: str
@@ -31,14 +48,14 @@ class Candidate(SQLModel, table=True):
     confidence_level: Optional[str] = Field(default="Low") # High, Medium, Low
     confidence_percentage: Optional[float] = Field(default=0.0)
     
-    # We use sa_column=Column(JSON) to store lists/dicts in SQLite/Postgres
-    strong_evidence: List[str] = Field(default=[], sa_column=Column(JSON))
-    weak_evidence: List[str] = Field(default=[], sa_column=Column(JSON))
-    missing_skills: List[str] = Field(default=[], sa_column=Column(JSON))
-    red_flags: List[str] = Field(default=[], sa_column=Column(JSON))
+    # We use sa_column=Column(JsonType) to store lists/dicts in SQLite/Postgres
+    strong_evidence: List[str] = Field(default=[], sa_column=Column(JsonType))
+    weak_evidence: List[str] = Field(default=[], sa_column=Column(JsonType))
+    missing_skills: List[str] = Field(default=[], sa_column=Column(JsonType))
+    red_flags: List[str] = Field(default=[], sa_column=Column(JsonType))
     
     # Stores the full math breakdown for transparency
-    audit_trail: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    audit_trail: Dict[str, Any] = Field(default={}, sa_column=Column(JsonType))
     
     project_id: int = Field(foreign_key="project.id")
     project: Project = Relationship(back_populates="candidates")
\ No newline at end of file
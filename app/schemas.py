@@ -0,0 +1,62 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Any, Dict, List, Optional
+
+# Shapes of the JSON returned by the LLMs (see SYSTEM_PROMPT / AGGREGATOR_SYSTEM_PROMPT).
+# Parsing with model_validate_json decodes and validates raw model output in one pass.
+# Unknown keys (e.g. model_source) are kept, and missing ones fall back to defaults.
+
+class EvidenceBreakdown(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    strong_evidence: List[str] = Field(default_factory=list)
+    weak_evidence: List[str] = Field(default_factory=list)
+    missing_skills: List[str] = Field(default_factory=list)
+    red_flags: List[str] = Field(default_factory=list)
+
+class FitReport(BaseModel):
+    '''
+    Per-model fit report.
+    '''
+    model_config = ConfigDict(extra="allow")
+
+    summary: Optional[str] = None
+    llm_adjustment: int = 0
+    adjustment_reasoning: Optional[str] = None
+    breakdown: EvidenceBreakdown = Field(default_factory=EvidenceBreakdown)
+    interview_questions: List[str] = Field(default_factory=list)
+
+    @field_validator("llm_adjustment", mode="before")
+    @classmethod
+    def _round_adjustment(cls, value):
+        # Models occasionally answer 5.0 or "5"; the score column is an int
+        if value is None:
+            return 0
+        return round(float(value))
+
+class AggregatedReport(BaseModel):
+    '''
+    Aggregator response: the consensus summary for FitReports merged by AggregatorClient.
+    '''
+    model_config = ConfigDict(extra="allow")
+
+    summary: Optional[str] = None
+
+def _string_list() -> Dict[str, Any]:
+    return {"type": "ARRAY", "items": {"type": "STRING"}}
+
+# FitReport as a Gemini response_schema (OpenAPI subset), so decoding is constrained to valid reports
+FIT_REPORT_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "llm_adjustment": {"type": "INTEGER"},
+        "adjustment_reasoning": {"type": "STRING"},
+        "breakdown": {
+            "type": "OBJECT",
+            "properties": {field: _string_list() for field in EvidenceBreakdown.model_fields},
+            "required": list(EvidenceBreakdown.model_fields),
+        },
+        "interview_questions": _string_list(),
+    },
+    "required": list(FitReport.model_fields),
+}
@@ -1,14 +1,122 @@
+import logging
 import os
 import google.generativeai as genai
-import json
+import orjson
+from difflib import SequenceMatcher
 from typing import Dict, Any, List
+from app import cache
 from app.constants import AGGREGATOR_SYSTEM_PROMPT
+from app.schemas import AggregatedReport, EvidenceBreakdown
+from app.services.llm_client import SystemPromptModel
+
+logger = logging.getLogger(__name__)
+
+# Minimum pairwise Jaccard similarity of strengths/weaknesses for reports to count as agreeing
+AGREEMENT_THRESHOLD = 0.8
+AGREEMENT_FIELDS = ("strong_evidence", "weak_evidence")
+# ...and their llm_adjustments may differ by at most this many points
+ADJUSTMENT_TOLERANCE = 5
+# Evidence lists of FitReport.breakdown, merged as de-duplicated unions
+BREAKDOWN_FIELDS = tuple(EvidenceBreakdown.model_fields)
+MAX_INTERVIEW_QUESTIONS = 5
+# Bullets at least this similar (difflib ratio) are merged as one
+NEAR_DUPLICATE_RATIO = 0.85
+# Ask Gemini to rewrite the merged summary when the reports disagree (otherwise the merge is fully local)
+LLM_SUMMARY_ENABLED = os.getenv("AGGREGATOR_LLM_SUMMARY") == "1"
+
+
+def _breakdown_items(report: Dict[str, Any], field: str) -> List[Any]:
+    return (report.get("breakdown") or {}).get(field) or []
+
+
+def _normalized_items(report: Dict[str, Any], field: str) -> set:
+    return {item.strip().lower() for item in _breakdown_items(report, field) if isinstance(item, str)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    # Two empty lists say nothing about whether the models agree
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _reports_agree(reports: List[Dict[str, Any]]) -> bool:
+    """
+    Checks whether every pair of reports lists (almost) the same strengths and weaknesses
+    and proposes a similar score adjustment.
+    """
+    adjustments = [report.get("llm_adjustment") or 0 for report in reports]
+    if max(adjustments) - min(adjustments) > ADJUSTMENT_TOLERANCE:
+        return False
+    for field in AGREEMENT_FIELDS:
+        item_sets = [_normalized_items(report, field) for report in reports]
+        for i in range(len(item_sets)):
+            for j in range(i + 1, len(item_sets)):
+                if _jaccard(item_sets[i], item_sets[j]) < AGREEMENT_THRESHOLD:
+                    return False
+    return True
+
+
+def _is_near_duplicate(key: str, kept_keys: List[str]) -> bool:
+    """
+    True if key reads (almost) the same as an already kept bullet.
+    """
+    for kept in kept_keys:
+        matcher = SequenceMatcher(None, key, kept)
+        # real_quick_ratio/quick_ratio are cheap upper bounds, so most pairs never reach ratio()
+        if matcher.real_quick_ratio() >= NEAR_DUPLICATE_RATIO and matcher.quick_ratio() >= NEAR_DUPLICATE_RATIO \
+                and matcher.ratio() >= NEAR_DUPLICATE_RATIO:
+            return True
+    return False
+
+
+def _dedupe(lists: List[List[Any]]) -> List[Any]:
+    """
+    Concatenates lists, dropping repeats: first occurrence wins, near-identical wording counts as a duplicate.
+    """
+    seen = set()
+    kept_keys: List[str] = []
+    items = []
+    for values in lists:
+        for item in values:
+            key = item.strip().lower() if isinstance(item, str) else item
+            if key in seen or (isinstance(key, str) and _is_near_duplicate(key, kept_keys)):
+                continue
+            seen.add(key)
+            if isinstance(key, str):
+                kept_keys.append(key)
+            items.append(item)
+    return items
+
+
+def _merge_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Builds the consensus FitReport locally: averaged llm_adjustment (with the reasoning of the report
+    closest to it), de-duplicated evidence lists and interview questions, and the longest summary.
+    """
+    adjustments = [report.get("llm_adjustment") or 0 for report in reports]
+    avg_adjustment = round(sum(adjustments) / len(adjustments))
+    closest = min(range(len(reports)), key=lambda i: abs(adjustments[i] - avg_adjustment))
+    return {
+        "summary": max((report.get("summary") or "" for report in reports), key=len),
+        "llm_adjustment": avg_adjustment,
+        "adjustment_reasoning": reports[closest].get("adjustment_reasoning"),
+        "breakdown": {
+            field: _dedupe([_breakdown_items(report, field) for report in reports])
+            for field in BREAKDOWN_FIELDS
+        },
+        "interview_questions": _dedupe(
+            [report.get("interview_questions") or [] for report in reports]
+        )[:MAX_INTERVIEW_QUESTIONS],
+        "model_source": "Ensemble ({})".format(", ".join(str(report.get("model_source", "unknown")) for report in reports)),
+    }
 
 
 class AggregatorClient:
     """
-    Synthesizes multiple LLM reports into a single, final report
-    using a "meta-analysis" LLM call.
+    Synthesizes multiple LLM reports into a single, final report.
+    Scores and lists are merged deterministically; a "meta-analysis" LLM call
+    is only used, when enabled, to rewrite the summary.
     """
     def __init__(self):
         """
@@ -19,12 +127,13 @@ class AggregatorClient:
             generation_config = genai.GenerationConfig(
                 response_mime_type="application/json"
             )
-            self.model = genai.GenerativeModel(
+            self.model = SystemPromptModel(
                 'gemini-2.5-pro',
+                AGGREGATOR_SYSTEM_PROMPT,
                 generation_config=generation_config
             )
         except Exception as e:
-            print(f"Error configuring Aggregator (Gemini) API: {e}")
+            logger.error("Error configuring Aggregator (Gemini) API: %s", e)
             self.model = None
 
     async def synthesize_reports(self, reports: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -35,56 +144,62 @@ class AggregatorClient:
         Returns:
             Dict[str, Any]: The synthesized final report.
         """
-        if not self.model:
-            return {"error": "Aggregator client is not configured."}
-
+        # Failed upstream models come through as {"error": ...}; only real reports count
+        reports = [report for report in reports if isinstance(report, dict) and "error" not in report]
         if not reports:
             return {"error": "No valid reports to synthesize."}
 
-        # Manually calculate average fit_score
-        total_score = 0
-        valid_reports_count = 0
-        for report in reports:
-            if "fit_score" in report:
-                total_score += report.get("fit_score", 0)
-                valid_reports_count += 1
-        
-        if valid_reports_count > 0:
-            avg_fit_score = round(total_score / valid_reports_count)
-        else:
-            avg_fit_score = 0
-
-        # Build a dynamic prompt
+        # Nothing to synthesize: a single valid report is already the final report
+        if len(reports) == 1:
+            solo = dict(reports[0])
+            solo["model_source"] = f"Solo ({solo.get('model_source', 'unknown')})"
+            return solo
+
+        canonical_reports = sorted(orjson.dumps(report, option=orjson.OPT_SORT_KEYS) for report in reports)
+        cache_key = cache.make_key("aggregator", *canonical_reports)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # The adjustment and lists are plain arithmetic and set union; no LLM needed
+        merged_report = _merge_reports(reports)
+        if not LLM_SUMMARY_ENABLED or not self.model or _reports_agree(reports):
+            await cache.set(cache_key, merged_report)
+            return merged_report
+
         # Build the user message for the synthesizer
-        reports_str_list = []
-        for i, report in enumerate(reports):
-            model_name = report.pop('model_source', f'Model {i+1}') # Get source and remove it
-            reports_str_list.append(f"--- REPORT {i+1} (from {model_name}) ---\n{json.dumps(report, indent=2)}")
-        
-        reports_str = "\n\n".join(reports_str_list)
+        # Only the per-model summaries and the already merged lists are sent, so the prompt stays small
+        # Compact orjson serialization: no indent whitespace for the LLM to pay for
+        summaries_str = "\n\n".join(
+            f"--- SUMMARY {i+1} (from {report.get('model_source', f'Model {i+1}')}) ---\n{report.get('summary') or ''}"
+            for i, report in enumerate(reports)
+        )
+        merged_lists = orjson.dumps(
+            {"breakdown": merged_report["breakdown"], "interview_questions": merged_report["interview_questions"]}
+        ).decode()
 
         user_message = f"""
-        Here are the {len(reports)} AI reports to synthesize:
+        Here are the summaries of {len(reports)} AI reports to synthesize:
 
-        {reports_str}
+        {summaries_str}
+
+        --- MERGED FINDINGS ---
+        {merged_lists}
 
         --- ANALYSIS ---
-        Please synthesize these into a single, final JSON report.
-        Use a "fit_score" of {avg_fit_score}.
+        Please write a new, synthesized "summary" consistent with the findings above
+        and an average score adjustment of {merged_report["llm_adjustment"]}.
         """
 
-        # Call the Gemini API to synthesize
+        # Call the Gemini API for the summary only
         try:
-            response = await self.model.generate_content_async(
-                [AGGREGATOR_SYSTEM_PROMPT, user_message]
-            )
-            final_report = json.loads(response.text)
-            
-            # Override the LLM's fit_score with our pre-calculated average
-            final_report["fit_score"] = avg_fit_score
-            
-            return final_report
-            
+            synthesized = AggregatedReport.model_validate_json(await self.model.generate_text_async([user_message]))
+            if synthesized.summary:
+                merged_report["summary"] = synthesized.summary
         except Exception as e:
-            print(f"An error occurred while synthesizing reports: {e}")
-            return {"error": f"Error: Could not synthesize the final report. {e}"}
\ No newline at end of file
+            # The deterministic merge is still a complete report
+            logger.exception("An error occurred while synthesizing the summary")
+            return merged_report
+
+        await cache.set(cache_key, merged_report)
+        return merged_report
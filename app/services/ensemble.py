@@ -0,0 +1,22 @@
+import asyncio
+from typing import Any, Dict, TypeGuard
+
+# Upper bound on a single model's turn, so a stuck local model can't hold up the others
+ENSEMBLE_TIMEOUT_SECONDS = 90
+
+def is_healthy(result: Any) -> TypeGuard[Dict[str, Any]]:
+    """
+    True for a usable report (not an exception and not an {"error": ...} result).
+    """
+    return isinstance(result, dict) and "error" not in result
+
+async def call_with_timeout(client: Any, timeout: float = ENSEMBLE_TIMEOUT_SECONDS, **kwargs) -> Dict[str, Any]:
+    """
+    Runs one client's `generate_summary_from_github_data` with a deadline and tags the report with its source.
+    Raises:
+        asyncio.TimeoutError: If the client doesn't answer within timeout seconds.
+    """
+    report = await asyncio.wait_for(client.generate_summary_from_github_data(**kwargs), timeout)
+    if isinstance(report, dict):
+        report.setdefault("model_source", type(client).__name__)
+    return report
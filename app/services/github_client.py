@@ -1,24 +1,335 @@
+import asyncio
+import functools
+import hishel
 import httpx
+import orjson
+import logging
 import os
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Profile, top repositories and their READMEs in a single round-trip
+CANDIDATE_BUNDLE_QUERY = """
+query($login: String!) {
+  user(login: $login) {
+    login
+    name
+    bio
+    company
+    location
+    websiteUrl
+    createdAt
+    url
+    followers { totalCount }
+    following { totalCount }
+    repositories(first: 10, privacy: PUBLIC, ownerAffiliations: OWNER, orderBy: {field: STARGAZERS, direction: DESC}) {
+      totalCount
+      nodes {
+        name
+        description
+        url
+        primaryLanguage { name }
+        stargazerCount
+        forkCount
+        diskUsage
+        isFork
+        hasWikiEnabled
+        pushedAt
+        defaultBranchRef { name }
+        repositoryTopics(first: 10) { nodes { topic { name } } }
+        readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+      }
+    }
+  }
+}
+"""
+
+class RateLimitRetryTransport(httpx.AsyncBaseTransport):
+    """
+    Retries GitHub rate-limit responses: 429s, and 403s that carry Retry-After or an exhausted
+    X-RateLimit-Remaining. It waits as long as GitHub asks, or backs off exponentially when it doesn't say.
+    At most max_wait seconds are spent waiting per request, well inside the clients' 10s timeout;
+    once a wait wouldn't fit (or retries run out) the rate-limit response is returned as is.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, retries: int = 3, max_wait: float = 5.0):
+        self._transport = transport
+        self.retries = retries
+        self.max_wait = max_wait
+
+    def _retry_delay(self, response: httpx.Response, attempt: int, waited: float) -> Optional[float]:
+        """
+        Seconds to wait before retrying response, or None if it shouldn't (or can't, having
+        already waited this long) be retried.
+        """
+        if response.status_code not in (403, 429):
+            return None
+        headers = response.headers
+        try:
+            if "retry-after" in headers:
+                delay = float(headers["retry-after"])
+            elif headers.get("x-ratelimit-remaining") == "0":
+                delay = float(headers.get("x-ratelimit-reset", 0)) - time.time()
+            elif response.status_code == 429:
+                delay = 2.0 ** attempt
+            else:
+                # A plain 403 is a permission error, not throttling
+                return None
+        except ValueError:
+            return None
+        return max(delay, 0.0) if waited + delay <= self.max_wait else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        waited = 0.0
+        for attempt in range(self.retries + 1):
+            response = await self._transport.handle_async_request(request)
+            # The last attempt's response is returned whatever it is
+            delay = self._retry_delay(response, attempt, waited) if attempt < self.retries else None
+            if delay is None:
+                break
+            await response.aclose()
+            logger.warning("GitHub rate limit on %s, retrying in %.1fs", request.url.path, delay)
+            await asyncio.sleep(delay)
+            waited += delay
+        if attempt and response.status_code in (403, 429):
+            logger.warning("GitHub rate limit on %s persisted after %d retries", request.url.path, attempt)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
 
 class GitHubClient:
     """
-    A client for interacting with the GitHub REST API.
+    A client for interacting with the GitHub GraphQL and REST APIs.
     """
     
     GITHUB_API_URL = "https://api.github.com"
-    GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-    
-    HEADERS = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "AI-Candidate-Screener/1.0",
-    }
-    
-    if GITHUB_TOKEN:
-        HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
-    else:
-        print("Warning: GITHUB_TOKEN not set. Requests may be rate-limited or blocked.")
+    GITHUB_RAW_URL = "https://raw.githubusercontent.com"
+    CACHE_TTL_SECONDS = 900
+    # Least-recently-used entries are evicted beyond this, so the cache can't grow with every username seen
+    CACHE_MAX_ENTRIES = 2048
+    # A bundle holds everything about a candidate, so it is kept fresher than single endpoints
+    BUNDLE_TTL_SECONDS = 300
+    README_CONCURRENCY = 10
+    README_MAX_BYTES = 2048
+    # READMEs still outstanding after this are skipped, so one slow repo can't hold up the analysis
+    README_DEADLINE_SECONDS = 5.0
+    CONNECT_RETRIES = 3
+    # On-disk HTTP cache: stale entries are revalidated with If-None-Match, and a 304 doesn't count against the rate limit
+    HTTP_CACHE_DIR = os.getenv("GITHUB_HTTP_CACHE_DIR", ".gh_cache")
+    HTTP_CACHE_TTL_SECONDS = 86400
+    # With REDIS_URL set, cached responses and ETags live in Redis and are shared by every worker
+    REDIS_URL = os.getenv("REDIS_URL")
+    USER_AGENT = "AI-Candidate-Screener/1.0"
+    # REST responses are trimmed to the fields the GraphQL bundle returns (all that analysis reads),
+    # dropping avatar/API URLs, node IDs and owner objects before they are cached or passed on
+    PROFILE_FIELDS = (
+        "login", "name", "bio", "company", "location", "blog", "created_at", "html_url",
+        "followers", "following", "public_repos",
+    )
+    REPO_FIELDS = (
+        "name", "description", "html_url", "language", "stargazers_count", "forks_count", "size",
+        "fork", "has_wiki", "has_pages", "pushed_at", "default_branch", "topics",
+    )
+
+    def __init__(self):
+        """
+        Initializes the GitHubClient. Connection pools are created lazily on first use
+        (inside the running event loop) and then shared by every call.
+        """
+        self._client: Optional[httpx.AsyncClient] = None
+        self._raw: Optional[httpx.AsyncClient] = None
+        # (endpoint, username, ...) -> (expires_at, value), in LRU order; re-scoring a candidate skips the network
+        self._cache: "OrderedDict[Tuple[str, ...], Tuple[float, Any]]" = OrderedDict()
+
+    def _cache_get(self, key: Tuple[str, ...]) -> Optional[Any]:
+        """
+        Returns a cached value if present and not expired.
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_set(self, key: Tuple[str, ...], value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores a value for ttl seconds (CACHE_TTL_SECONDS by default).
+        """
+        self._cache[key] = (time.monotonic() + (self.CACHE_TTL_SECONDS if ttl is None else ttl), value)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    @functools.cached_property
+    def _token(self) -> Optional[str]:
+        """
+        The GitHub token, read on first use rather than at import time,
+        so a token loaded later (e.g. by load_dotenv) is still picked up.
+        """
+        return os.getenv("GITHUB_TOKEN")
+
+    @functools.cached_property
+    def _headers(self) -> Dict[str, str]:
+        """
+        Default headers for api.github.com, authenticated when a token is available.
+        """
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": self.USER_AGENT,
+        }
+        if self._token:
+            headers["Authorization"] = f"token {self._token}"
+        else:
+            logger.warning("GITHUB_TOKEN not set. Requests may be rate-limited or blocked.")
+        return headers
+
+    def _cache_storage(self) -> hishel.AsyncBaseStorage:
+        """
+        Returns the HTTP cache backend: Redis when REDIS_URL is set (and the redis package is installed),
+        otherwise files under HTTP_CACHE_DIR, which only this machine's workers share.
+        """
+        if self.REDIS_URL:
+            try:
+                import redis.asyncio as redis  # type: ignore[import-not-found]
+                return hishel.AsyncRedisStorage(client=redis.from_url(self.REDIS_URL), ttl=self.HTTP_CACHE_TTL_SECONDS)
+            except ImportError:
+                logger.warning("REDIS_URL is set but the redis package is not installed; caching GitHub responses on disk")
+        return hishel.AsyncFileStorage(base_path=Path(self.HTTP_CACHE_DIR), ttl=self.HTTP_CACHE_TTL_SECONDS)
+
+    def _caching_transport(self, limits: httpx.Limits) -> hishel.AsyncCacheTransport:
+        """
+        Wraps an HTTP/2 transport with an RFC 9111 cache that honors GitHub's Cache-Control/ETag headers.
+        The transport retries failed connection attempts CONNECT_RETRIES times, and
+        rate-limited requests (429 / throttling 403s) as GitHub's Retry-After headers allow.
+        """
+        return hishel.AsyncCacheTransport(
+            transport=RateLimitRetryTransport(
+                httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=self.CONNECT_RETRIES)
+            ),
+            storage=self._cache_storage(),
+        )
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """
+        Returns the long-lived HTTP/2 pool for api.github.com,
+        so every call reuses the same TCP+TLS connection instead of opening a new one.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.GITHUB_API_URL,
+                headers=self._headers,
+                transport=self._caching_transport(httpx.Limits(max_connections=50, max_keepalive_connections=20)),
+                timeout=10.0,
+            )
+        return self._client
+
+    async def _get_raw_client(self) -> httpx.AsyncClient:
+        """
+        Returns the HTTP/2 pool for raw.githubusercontent.com. It is a different host,
+        so a dedicated pool multiplexes every README download over one connection.
+        """
+        if self._raw is None:
+            self._raw = httpx.AsyncClient(
+                base_url=self.GITHUB_RAW_URL,
+                headers={"User-Agent": self.USER_AGENT},
+                transport=self._caching_transport(httpx.Limits(max_keepalive_connections=8)),
+                timeout=10.0,
+            )
+        return self._raw
+
+    async def aclose(self) -> None:
+        """
+        Closes the underlying connection pools.
+        """
+        clients = [client for client in (self._client, self._raw) if client is not None]
+        self._client = self._raw = None
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def fetch_bundle(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetches the profile, top 10 repositories (by stars) and their READMEs
+        with a single GraphQL query, shaped like the REST responses.
+        GraphQL requires authentication, so this returns None without a token.
+        Args:
+            username (str): GitHub username.
+        Returns:
+            Optional[Dict[str, Any]]: {"profile": ..., "repos": [...], "readmes": {name: text}} or None on failure.
+        """
+        if not self._token:
+            return None
+
+        cache_key = ("bundle", username)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        client = await self._get_client()
+        try:
+            response = await client.post(
+                "/graphql",
+                json={"query": CANDIDATE_BUNDLE_QUERY, "variables": {"login": username}}
+            )
+            response.raise_for_status()
+            user = (orjson.loads(response.content).get("data") or {}).get("user")
+        except httpx.HTTPStatusError as e:
+            logger.error("GitHub API Error (GraphQL): %s - %s", e.response.status_code, e.response.text)
+            return None
+        except Exception:
+            logger.exception("Unexpected Error (GraphQL)")
+            return None
+
+        if not user:
+            return None
+
+        repositories = user.get("repositories") or {}
+        profile = {
+            "login": user.get("login"),
+            "name": user.get("name"),
+            "bio": user.get("bio"),
+            "company": user.get("company"),
+            "location": user.get("location"),
+            "blog": user.get("websiteUrl"),
+            "created_at": user.get("createdAt"),
+            "html_url": user.get("url"),
+            "followers": (user.get("followers") or {}).get("totalCount", 0),
+            "following": (user.get("following") or {}).get("totalCount", 0),
+            "public_repos": repositories.get("totalCount", 0),
+        }
+
+        repos = []
+        readmes = {}
+        for node in repositories.get("nodes") or []:
+            repos.append({
+                "name": node.get("name"),
+                "description": node.get("description"),
+                "html_url": node.get("url"),
+                "language": (node.get("primaryLanguage") or {}).get("name"),
+                "stargazers_count": node.get("stargazerCount", 0),
+                "forks_count": node.get("forkCount", 0),
+                "size": node.get("diskUsage") or 0,
+                "fork": node.get("isFork", False),
+                "has_wiki": node.get("hasWikiEnabled", False),
+                "pushed_at": node.get("pushedAt"),
+                "default_branch": (node.get("defaultBranchRef") or {}).get("name"),
+                "topics": [t["topic"]["name"] for t in (node.get("repositoryTopics") or {}).get("nodes", [])],
+            })
+            readme_text = (node.get("readme") or {}).get("text")
+            if readme_text:
+                # GraphQL returns the whole file; keep the same leading bytes fetch_readme would
+                readmes[node.get("name")] = readme_text.encode('utf-8')[:self.README_MAX_BYTES].decode('utf-8', errors='ignore')
+
+        bundle = {"profile": profile, "repos": repos, "readmes": readmes}
+        self._cache_set(cache_key, bundle, self.BUNDLE_TTL_SECONDS)
+        return bundle
 
     async def get_user_profile(self, username: str) -> Optional[Dict[str, Any]]:
         """
@@ -28,21 +339,28 @@ class GitHubClient:
         Returns:
             Optional[Dict[str, Any]]: User profile data or None if not found.
         """
-        url = f"{self.GITHUB_API_URL}/users/{username}"
-        print(f"DEBUG: Fetching profile for '{username}' at {url}")
+        cache_key = ("profile", username)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        url = f"/users/{username}"
+        logger.debug("Fetching profile for %s at %s", username, url)
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.HEADERS)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                # --- NEW: Print the actual error message from GitHub ---
-                print(f"GitHub API Error (Profile): {e.response.status_code} - {e.response.text}")
-                return None
-            except Exception as e:
-                print(f"Unexpected Error (Profile): {e}")
-                return None
+        client = await self._get_client()
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            profile = {field: data[field] for field in self.PROFILE_FIELDS if field in data}
+            self._cache_set(cache_key, profile)
+            return profile
+        except httpx.HTTPStatusError as e:
+            logger.error("GitHub API Error (Profile): %s - %s", e.response.status_code, e.response.text)
+            return None
+        except Exception:
+            logger.exception("Unexpected Error (Profile)")
+            return None
         
     async def get_user_repos(self, username: str) -> List[Dict[str, Any]]:
         """
@@ -52,52 +370,122 @@ class GitHubClient:
         Returns:
             List[Dict[str, Any]]: List of repository data.
         """
-        url = f"{self.GITHUB_API_URL}/users/{username}/repos"
-        params = {'sort': 'stargazers_count', 'per_page': 10, 'direction': 'desc'}
+        cache_key = ("repos", username)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        url = f"/users/{username}/repos"
+        params: Dict[str, Union[str, int]] = {'sort': 'stargazers_count', 'per_page': 10, 'direction': 'desc'}
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.HEADERS, params=params)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                print(f"GitHub API Error (Repos): {e.response.status_code} - {e.response.text}")
-                return []
-            except Exception as e:
-                print(f"Unexpected Error (Repos): {e}")
-                return []
-
-    async def get_readme_content(self, username: str, repo_name: str) -> Optional[str]:
-        """
-        Fetches the decoded content of the README.md file for a repository.
+        client = await self._get_client()
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            repos = [
+                {field: repo[field] for field in self.REPO_FIELDS if field in repo}
+                for repo in orjson.loads(response.content)
+            ]
+            self._cache_set(cache_key, repos)
+            return repos
+        except httpx.HTTPStatusError as e:
+            logger.error("GitHub API Error (Repos): %s - %s", e.response.status_code, e.response.text)
+            return []
+        except Exception:
+            logger.exception("Unexpected Error (Repos)")
+            return []
+
+    async def get_readme_content(
+            self,
+            username: str,
+            repo_name: str,
+            default_branch: Optional[str] = None,
+            max_bytes: Optional[int] = None
+        ) -> Optional[str]:
+        """
+        Fetches the raw content of the README for a repository in a single round-trip.
+        README.md is requested from raw.githubusercontent.com first; if the repo names it differently
+        (README, readme.rst, ...), the API's /readme endpoint is asked for the decoded file directly
+        via the raw media type instead of returning JSON metadata.
         Args:
             username (str): GitHub username.
             repo_name (str): Repository name.
+            default_branch (Optional[str]): Branch to read from, when known (avoids resolving HEAD).
+            max_bytes (Optional[int]): Only download this many leading bytes (README_MAX_BYTES by default).
         Returns:
             Optional[str]: README content as a string, or None if not found.
         """
-        url = f"{self.GITHUB_API_URL}/repos/{username}/{repo_name}/readme"
+        max_bytes = max_bytes or self.README_MAX_BYTES
+        cache_key = ("readme", username, repo_name, str(max_bytes))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        url = f"/{username}/{repo_name}/{default_branch or 'HEAD'}/README.md"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.HEADERS)
-                response.raise_for_status()
-                readme_data = response.json()
-                download_url = readme_data.get('download_url')
-                
-                if not download_url:
-                    return None
-
-                # Fetch raw content
-                content_response = await client.get(download_url)
-                return content_response.text
-            
-            except (httpx.HTTPStatusError, KeyError):
-                # 404s are common for missing READMEs, so we don't need to spam logs here
-                return None
-            except Exception as e:
-                print(f"Unexpected Error (Readme): {e}")
-                return None
+        # The prompts only use the start of each README, so ask for just that prefix
+        range_header = {"Range": f"bytes=0-{max_bytes - 1}"}
+        client = await self._get_raw_client()
+        try:
+            response = await client.get(url, headers=range_header)
+            if response.status_code == 404:
+                api_client = await self._get_client()
+                response = await api_client.get(
+                    f"/repos/{username}/{repo_name}/readme",
+                    params={"ref": default_branch} if default_branch else None,
+                    headers={"Accept": "application/vnd.github.raw", **range_header},
+                )
+            response.raise_for_status()
+            # Slice in case the server ignored Range; a multi-byte char cut at the boundary is dropped
+            readme = response.content[:max_bytes].decode('utf-8', errors='ignore')
+            self._cache_set(cache_key, readme)
+            return readme
+        except httpx.HTTPStatusError:
+            # 404s are common for missing READMEs, so we don't need to spam logs here
+            return None
+        except Exception:
+            logger.exception("Unexpected Error (Readme)")
+            return None
+
+    async def get_readmes_bulk(
+            self,
+            username: str,
+            repo_names: List[str],
+            default_branches: Optional[Dict[str, Optional[str]]] = None
+        ) -> Dict[str, Optional[str]]:
+        """
+        Fetches the READMEs of several repositories concurrently over the shared pool,
+        at most README_CONCURRENCY at a time. Results are collected as they land; whatever
+        hasn't arrived within README_DEADLINE_SECONDS is cancelled and reported as missing.
+        Args:
+            username (str): GitHub username.
+            repo_names (List[str]): Repository names.
+            default_branches (Optional[Dict[str, Optional[str]]]): Default branch per repo name, when known.
+        Returns:
+            Dict[str, Optional[str]]: README content keyed by repo name (None if missing or late).
+        """
+        semaphore = asyncio.Semaphore(self.README_CONCURRENCY)
+        branches = default_branches or {}
+
+        async def bounded(name: str) -> Tuple[str, Optional[str]]:
+            async with semaphore:
+                try:
+                    return name, await self.get_readme_content(username, name, branches.get(name))
+                except Exception:
+                    return name, None
+
+        readmes: Dict[str, Optional[str]] = dict.fromkeys(repo_names)
+        tasks = [asyncio.ensure_future(bounded(name)) for name in repo_names]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.README_DEADLINE_SECONDS):
+                name, content = await next_done
+                readmes[name] = content
+        except asyncio.TimeoutError:
+            logger.warning("Skipping %d README(s) for %s after %ss", sum(not t.done() for t in tasks), username, self.README_DEADLINE_SECONDS)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return readmes
                 
     async def get_repo_details(self, username: str, repo_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -108,18 +496,18 @@ class GitHubClient:
         Returns:
             Optional[Dict[str, Any]]: Repository details or None if not found.
         """
-        url = f"{self.GITHUB_API_URL}/repos/{username}/{repo_name}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.HEADERS)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                print(f"GitHub API Error (Repo Details): {e.response.status_code}")
-                return None
-            except Exception as e:
-                 print(f"Unexpected Error (Repo Details): {e}")
-                 return None
+        url = f"/repos/{username}/{repo_name}"
+        client = await self._get_client()
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            logger.error("GitHub API Error (Repo Details): %s", e.response.status_code)
+            return None
+        except Exception:
+            logger.exception("Unexpected Error (Repo Details)")
+            return None
 
     async def get_repo_commits(self, username: str, repo_name: str, max_commits: int = 50) -> List[Dict[str, Any]]:
         """
@@ -137,17 +525,17 @@ class GitHubClient:
             return []
         default_branch = repo_info['default_branch']
 
-        url = f"{self.GITHUB_API_URL}/repos/{username}/{repo_name}/commits"
+        url = f"/repos/{username}/{repo_name}/commits"
         params = {'sha': default_branch, 'per_page': min(max_commits, 100)}
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.HEADERS, params=params)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                print(f"GitHub API Error (Commits): {e.response.status_code}")
-                return []
-            except Exception as e:
-                 print(f"Unexpected Error (Commits): {e}")
-                 return []
\ No newline at end of file
+        client = await self._get_client()
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            logger.error("GitHub API Error (Commits): %s", e.response.status_code)
+            return []
+        except Exception:
+            logger.exception("Unexpected Error (Commits)")
+            return []
\ No newline at end of file
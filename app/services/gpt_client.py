@@ -1,9 +1,26 @@
+import hashlib
+import logging
 import os
 import openai
-import json
+import orjson
 from typing import Dict, Any, Optional
 
+from app.schemas import FitReport
+from app.services import http_pool
 from app.services.llm_client import SYSTEM_PROMPT 
+from app.services.prompt_utils import build_github_context, format_sectioned_message
+from app.services.rate_limiter import call_with_retries, estimate_tokens, limiter_from_env
+
+logger = logging.getLogger(__name__)
+
+# The system message is built once and always sent first, unchanged, so OpenAI's
+# automatic prefix cache can reuse it; the key routes these requests to the same cache
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+PROMPT_CACHE_KEY = "fit-report-sys-" + hashlib.blake2b(SYSTEM_PROMPT.encode("utf-8"), digest_size=4).hexdigest()
+
+# OPENAI_RPM / OPENAI_TPM override the defaults
+OPENAI_LIMITER = limiter_from_env("OPENAI", 500, 200_000)
+OPENAI_RETRY_ON = (openai.RateLimitError, openai.APITimeoutError)
 
 class GPTClient:
     """
@@ -15,11 +32,11 @@ class GPTClient:
         Initializes the GPTClient and configures the OpenAI API.
         """
         try:
-            # Use the Async client for FastAPI
-            self.client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            # Use the Async client for FastAPI, on the shared keep-alive pool
+            self.client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_pool.shared_client())
             self.model = "gpt-3.5-turbo" # gpt-3.5-turbo if 4o isn't on free tier
         except Exception as e:
-            print(f"Error configuring OpenAI API: {e}")
+            logger.error("Error configuring OpenAI API: %s", e)
             self.client = None
 
     async def generate_summary_from_github_data(
@@ -29,7 +46,10 @@ class GPTClient:
             readmes: dict,
             job_description: str,
             resume_text: str,
-            linkedin_text: Optional[str] = None
+            linkedin_text: Optional[str] = None,
+            quantitative_scores: Optional[Dict[str, Any]] = None,
+            job_embedding: Optional[Any] = None,
+            project_id: Optional[int] = None
         ) -> Dict[str, Any]:
         """
         Generates a structured JSON fit report using the OpenAI API.
@@ -40,6 +60,9 @@ class GPTClient:
             job_description (str): Job description text.
             resume_text (str): Candidate resume text.
             linkedin_text (Optional[str]): Candidate LinkedIn profile text.
+            quantitative_scores (Optional[Dict[str, Any]]): Pre-calculated quantitative scores.
+            job_embedding, project_id: Unused (semantic cache key inputs for LLMClient); accepted so
+                ModelPool can pass every client the same arguments.
         Returns:
             Dict[str, Any]: Generated fit report as a dictionary.
         """
@@ -47,42 +70,31 @@ class GPTClient:
             return {"error": "OpenAI API is not configured. Check your OPENAI_API_KEY."}
 
         # Build the user message
-        github_context = f"GitHub Profile Bio: {profile.get('bio', 'Not provided.')}\n\n"
-        github_context += "Top Repositories (by stars):\n"
-        for repo in repos[:5]:
-            repo_name = repo.get('name', 'N/A')
-            description = repo.get('description', 'No description.')
-            language = repo.get('language', 'N/A')
-            stars = repo.get('stargazers_count', 0)
-            readme = readmes.get(repo_name, "No README found.")
-            github_context += f"\n---\nRepo: {repo_name}\nPrimary Language: {language}\nStars: {stars}\nDescription: {description}\nREADME Summary (first 1500 chars): {readme[:1500]}\n---\n"
+        github_context = build_github_context(profile, repos, readmes)
         
-        user_message_segments = [
-            "--- JOB DESCRIPTION ---", job_description,
-            "--- CANDIDATE RESUME TEXT ---", resume_text
-        ]
-        if linkedin_text:
-            user_message_segments.extend(["--- CANDIDATE LINKEDIN TEXT ---", linkedin_text])
-        user_message_segments.extend([
-            "--- CANDIDATE GITHUB DATA ---", github_context,
-            "--- ANALYSIS ---", "Please generate the JSON fit report based on the rules. Start your response with {."
-        ])
-        user_message = "\n\n".join(user_message_segments)
+        scores_json = orjson.dumps(quantitative_scores, option=orjson.OPT_INDENT_2).decode() if quantitative_scores else None
+        user_message = format_sectioned_message(job_description, resume_text, github_context, linkedin_text, scores_json)
+
+        # Call the OpenAI API, throttled and retried on rate limits
+        async def attempt():
+            async with OPENAI_LIMITER.reserve(estimate_tokens(user_message)):
+                return await self.client.chat.completions.create(
+                    model=self.model,
+                    response_format={"type": "json_object"},
+                    messages=[
+                        SYSTEM_MESSAGE,
+                        {"role": "user", "content": user_message}
+                    ],
+                    extra_body={"prompt_cache_key": PROMPT_CACHE_KEY}
+                )
 
-        # Call the OpenAI API
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_message}
-                ]
-            )
-            report = json.loads(response.choices[0].message.content)
+            response = await call_with_retries(attempt, OPENAI_RETRY_ON)
+            # Validated straight from the JSON text, so GPT reports get the same shape and defaults as Gemini's
+            report = FitReport.model_validate_json(response.choices[0].message.content).model_dump()
             report['model_source'] = 'OpenAI (GPT-3.5 turbo)'
             return report
             
         except Exception as e:
-            print(f"An error occurred while calling the OpenAI API: {e}")
+            logger.exception("An error occurred while calling the OpenAI API")
             return {"error": f"Error: Could not generate a summary from OpenAI. {e}"}
\ No newline at end of file
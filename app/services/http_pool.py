@@ -0,0 +1,26 @@
+import httpx
+from typing import Optional
+
+# Keep-alive pool for outbound calls to LLM providers; connections idle for up to
+# five minutes stay open, so back-to-back requests skip the TCP+TLS handshake
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=30, keepalive_expiry=300)
+POOL_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+_client: Optional[httpx.AsyncClient] = None
+
+def shared_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide HTTP/2 client the OpenAI SDK sends its requests through,
+    creating it on first use (or after aclose()). The Ollama client builds its own, with the same POOL_LIMITS.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(http2=True, limits=POOL_LIMITS, timeout=POOL_TIMEOUT)
+    return _client
+
+async def aclose() -> None:
+    """
+    Closes the shared client; call on application shutdown.
+    """
+    if _client is not None:
+        await _client.aclose()
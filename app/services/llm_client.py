@@ -1,17 +1,169 @@
+import logging
 import os
+import asyncio
+import inspect
+import datetime
 import google.generativeai as genai
-import json
-from typing import Dict, Any, Optional, List
-from app.constants import SYSTEM_PROMPT
+from google.api_core.exceptions import DeadlineExceeded, NotFound, ResourceExhausted, ServiceUnavailable
+import numpy as np
+import orjson
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple, Union
+from app import cache
+from app.constants import JD_SUMMARY_PROMPT, SYSTEM_PROMPT
+from app.schemas import FIT_REPORT_RESPONSE_SCHEMA, FitReport
+from app.services.prompt_utils import GITHUB_TOKENS, JD_SUMMARY_MIN_CHARS, JD_TOKENS, RESUME_TOKENS, truncate_to_tokens
+from app.services.rate_limiter import call_with_retries, estimate_tokens, limiter_from_env
+from app.services.semantic_cache import SEMANTIC_CACHE_ENABLED, cache_scope, embed, semantic_cache
+
+logger = logging.getLogger(__name__)
+
+# The flash tier answers this fixed-schema task several times faster and cheaper than pro
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+# Called with each text chunk as it streams in (e.g. to forward over Server-Sent Events)
+ChunkCallback = Callable[[str], Union[None, Awaitable[None]]]
+
+async def read_streamed_text(response, on_chunk: Optional[ChunkCallback] = None) -> bytearray:
+    """
+    Drains a streamed Gemini response into one UTF-8 buffer as chunks arrive.
+    Args:
+        response: The async iterable returned by generate_content_async(..., stream=True).
+        on_chunk (Optional[ChunkCallback]): Sync or async callback invoked with each chunk's text.
+    Returns:
+        bytearray: The full response text.
+    """
+    buffer = bytearray()
+    async for chunk in response:
+        text = chunk.text
+        buffer.extend(text.encode('utf-8'))
+        if on_chunk is not None:
+            result = on_chunk(text)
+            if inspect.isawaitable(result):
+                await result
+    return buffer
+
+# Per-candidate user message scaffolds; only the field substitution happens per call
+USER_MESSAGE_TEMPLATE = (
+    "--- JOB DESCRIPTION ---\n{jd}\n\n"
+    "--- RESUME ---\n{resume}\n\n"
+    "--- LINKEDIN ---\n{linkedin}\n\n"
+    "--- GITHUB SUMMARY ---\n{gh}"
+)
+USER_MESSAGE_WITH_SCORES_TEMPLATE = USER_MESSAGE_TEMPLATE + (
+    "\n\n--- QUANTITATIVE SCORES ---\n{scores}\n\n"
+    "\nTASK: Analyze the evidence above. Does the candidate deserve a higher or lower score than the math suggests? "
+    "Provide your 'llm_adjustment' and evidence breakdown."
+)
+
+# Upload system prompts once as Gemini context caches instead of resending them on every call
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE") == "1"
+CONTEXT_CACHE_TTL = datetime.timedelta(hours=1)
+
+# Shared by every Gemini caller in the process (GEMINI_RPM / GEMINI_TPM override the defaults)
+GEMINI_LIMITER = limiter_from_env("GEMINI", 150, 1_000_000)
+GEMINI_RETRY_ON = (ResourceExhausted, ServiceUnavailable, DeadlineExceeded)
+
+class SystemPromptModel:
+    """
+    A Gemini model bound to a fixed system prompt.
+    With GEMINI_CONTEXT_CACHE=1 the prompt is stored server-side as a context cache, so each call
+    only sends (and is billed full price for) the user parts; otherwise it is sent inline as the first part.
+    """
+
+    def __init__(self, model_name: str, system_prompt: str, generation_config: Any = None, context_cache: bool = True):
+        self.model_name = model_name
+        self.system_prompt = system_prompt
+        self.generation_config = generation_config
+        self._model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        # Short prompts fall below Gemini's minimum cacheable size, so callers can opt out
+        self._cached_model = self._create_cached_model() if CONTEXT_CACHE_ENABLED and context_cache else None
+
+    def _create_cached_model(self) -> Optional[genai.GenerativeModel]:
+        """
+        Creates the context cache and a model bound to it, or None if caching isn't possible.
+        """
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=f"models/{self.model_name}",
+                system_instruction=self.system_prompt,
+                ttl=CONTEXT_CACHE_TTL,
+            )
+            return genai.GenerativeModel.from_cached_content(cached_content, generation_config=self.generation_config)
+        except Exception as e:
+            # e.g. the prompt is below the model's minimum cacheable token count
+            logger.warning("Gemini context cache unavailable, sending the system prompt inline: %s", e)
+            return None
+
+    async def generate_text_async(self, parts: List[str], on_chunk: Optional[ChunkCallback] = None, **kwargs) -> bytearray:
+        """
+        Streams a response to parts, with the system prompt supplied automatically, and returns its full text.
+        Calls are throttled by GEMINI_LIMITER and retried with backoff on quota and availability errors,
+        including ones raised mid-stream; a retry streams again from the start, so on_chunk can see
+        a failed attempt's partial text before the complete one.
+        """
+        async def attempt():
+            async with GEMINI_LIMITER.reserve(estimate_tokens("".join(parts))):
+                response = await self._generate(parts, stream=True, **kwargs)
+                return await read_streamed_text(response, on_chunk)
+        return await call_with_retries(attempt, GEMINI_RETRY_ON)
+
+    async def _generate(self, parts: List[str], **kwargs):
+        if self._cached_model is not None:
+            try:
+                return await self._cached_model.generate_content_async(parts, **kwargs)
+            except NotFound:
+                # The cache expired or was evicted; rebuild it once
+                self._cached_model = await asyncio.to_thread(self._create_cached_model)
+                if self._cached_model is not None:
+                    return await self._cached_model.generate_content_async(parts, **kwargs)
+        return await self._model.generate_content_async([self.system_prompt, *parts], **kwargs)
+
+_REPORT_KEY_PREFIX = cache.key_hasher(MODEL_NAME, SYSTEM_PROMPT)
+
+def _report_cache_key(user_message: str) -> str:
+    """
+    Hashes the exact prompt sent for one candidate.
+    """
+    return cache.make_key(user_message, prefix=_REPORT_KEY_PREFIX)
 
 class LLMClient:
     def __init__(self):
         try:
             genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-            self.model = genai.GenerativeModel('gemini-2.5-pro', generation_config={"response_mime_type": "application/json"})
+            generation_config = genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=FIT_REPORT_RESPONSE_SCHEMA
+            )
+            self.model = SystemPromptModel(MODEL_NAME, SYSTEM_PROMPT, generation_config=generation_config)
+            self.jd_model = SystemPromptModel(MODEL_NAME, JD_SUMMARY_PROMPT, context_cache=False)
         except Exception as e:
-            print(f"Error configuring Gemini API: {e}")
+            logger.error("Error configuring Gemini API: %s", e)
             self.model = None
+            self.jd_model = None
+
+    async def summarize_job_description(self, job_description: str) -> Optional[str]:
+        """
+        Condenses a job description too long for its prompt budget.
+        Args:
+            job_description (str): Job description text.
+        Returns:
+            Optional[str]: The summary, or None if the JD fits its budget or summarizing failed.
+        """
+        if not self.jd_model or len(job_description) <= JD_SUMMARY_MIN_CHARS:
+            return None
+        cache_key = cache.make_key(MODEL_NAME, JD_SUMMARY_PROMPT, job_description)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            summary = (await self.jd_model.generate_text_async([job_description])).decode('utf-8').strip()
+        except Exception as e:
+            logger.warning("JD summary failed, prompts will use the truncated JD: %s", e)
+            return None
+        if not summary:
+            return None
+        await cache.set(cache_key, summary)
+        return summary
 
     async def generate_summary_from_github_data(
             self, 
@@ -21,7 +173,10 @@ class LLMClient:
             job_description: str,
             resume_text: str,
             linkedin_text: Optional[str] = None,
-            quantitative_scores: Optional[Dict[str, Any]] = None # <-- NEW INPUT
+            quantitative_scores: Optional[Dict[str, Any]] = None, # <-- NEW INPUT
+            on_chunk: Optional[ChunkCallback] = None,
+            job_embedding: Optional[np.ndarray] = None,
+            project_id: Optional[int] = None
         ) -> Dict[str, Any]:
 
         """
@@ -34,36 +189,108 @@ class LLMClient:
             resume_text (str): Candidate resume text.
             linkedin_text (Optional[str]): Candidate LinkedIn profile text.
             quantitative_scores (Optional[Dict[str, Any]]): Pre-calculated quantitative scores.
+            on_chunk (Optional[ChunkCallback]): Receives the raw response text as it streams in.
+                Not called when the report is served from cache or by an identical in-flight request.
+            job_embedding (Optional[np.ndarray]): The project's stored JD embedding for the semantic cache key.
+            project_id (Optional[int]): The project being scored for; semantic cache hits never cross projects.
         Returns:
             Dict[str, Any]: Generated fit report as a dictionary.
         """
         
         if not self.model: return {"error": "Gemini API is not configured."}
 
+        github_context = self._build_github_context(profile, repos)
+        user_message = self._build_user_message(
+            profile, repos, readmes, job_description, resume_text, linkedin_text, quantitative_scores,
+            github_context=github_context
+        )
+
+        # L1: identical prompt
+        cache_key = _report_cache_key(user_message)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # L2: a near-identical JD/resume/GitHub context for the same candidate, project and scores;
+        # the key is only embedded when that cache is enabled
+        key: Optional[Tuple[np.ndarray, str]] = None
+        if SEMANTIC_CACHE_ENABLED:
+            scope = cache_scope(profile.get('login') or '', project_id, quantitative_scores)
+            key_vector = await asyncio.to_thread(embed, job_description, resume_text, github_context, job_embedding)
+            similar = await semantic_cache.lookup(key_vector, scope)
+            if similar is not None:
+                return similar
+            key = (key_vector, scope)
+
+        async def generate() -> Dict[str, Any]:
+            report = await self._call_model(user_message, cache_key, on_chunk)
+            if key is not None and "error" not in report:
+                await semantic_cache.add(*key, report)
+            return report
+
+        # Identical prompts already in flight share that call
+        return await cache.single_flight(cache_key, generate)
+
+    def _build_user_message(
+            self,
+            profile: dict,
+            repos: list,
+            readmes: dict,
+            job_description: str,
+            resume_text: str,
+            linkedin_text: Optional[str] = None,
+            quantitative_scores: Optional[Dict[str, Any]] = None,
+            github_context: Optional[str] = None
+        ) -> str:
+        """
+        Builds the per-candidate user message sent alongside SYSTEM_PROMPT.
+        """
         # 1. Build GitHub Context
-        github_context = f"Bio: {profile.get('bio', 'N/A')}, Public Repos: {profile.get('public_repos', 0)}\n"
-        for repo in repos[:5]:
-            github_context += f"- Repo: {repo.get('name')} | Lang: {repo.get('language')} | Stars: {repo.get('stargazers_count')} | Desc: {repo.get('description')}\n"
+        if github_context is None:
+            github_context = self._build_github_context(profile, repos)
+        # Keep each section within its token budget
+        job_description = truncate_to_tokens(job_description, JD_TOKENS)
+        resume_text = truncate_to_tokens(resume_text, RESUME_TOKENS)
+        github_context = truncate_to_tokens(github_context, GITHUB_TOKENS)
 
         # 2. Build User Message
-        user_message_segments = [
-            f"--- JOB DESCRIPTION ---\n{job_description}",
-            f"--- RESUME ---\n{resume_text}",
-            f"--- LINKEDIN ---\n{linkedin_text or 'Not provided'}",
-            f"--- GITHUB SUMMARY ---\n{github_context}"
-        ]
-
         # --- Pass the Math to the AI ---
         if quantitative_scores:
-            user_message_segments.append(f"--- QUANTITATIVE SCORES ---\n{json.dumps(quantitative_scores, indent=2)}")
-            user_message_segments.append("\nTASK: Analyze the evidence above. Does the candidate deserve a higher or lower score than the math suggests? Provide your 'llm_adjustment' and evidence breakdown.")
-        
-        user_message = "\n\n".join(user_message_segments)
+            return USER_MESSAGE_WITH_SCORES_TEMPLATE.format(
+                jd=job_description,
+                resume=resume_text,
+                linkedin=linkedin_text or 'Not provided',
+                gh=github_context,
+                scores=orjson.dumps(quantitative_scores, option=orjson.OPT_INDENT_2).decode(),
+            )
+        return USER_MESSAGE_TEMPLATE.format(
+            jd=job_description,
+            resume=resume_text,
+            linkedin=linkedin_text or 'Not provided',
+            gh=github_context,
+        )
 
-        # 3. Call AI
+    @staticmethod
+    def _build_github_context(profile: dict, repos: list) -> str:
+        """
+        Summarizes the profile and top repositories as the GitHub section of the prompt.
+        """
+        github_parts = [f"Bio: {profile.get('bio', 'N/A')}, Public Repos: {profile.get('public_repos', 0)}\n"]
+        github_parts.extend(
+            f"- Repo: {repo.get('name')} | Lang: {repo.get('language')} | Stars: {repo.get('stargazers_count')} | Desc: {repo.get('description')}\n"
+            for repo in repos[:5]
+        )
+        return "".join(github_parts)
+
+    async def _call_model(self, user_message: str, cache_key: str, on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
+        """
+        Calls Gemini for one candidate's prompt and caches a successful report under cache_key.
+        """
+        # 4. Call AI
         try:
-            response = await self.model.generate_content_async([SYSTEM_PROMPT, user_message])
-            return json.loads(response.text)
+            report = FitReport.model_validate_json(await self.model.generate_text_async([user_message], on_chunk)).model_dump()
+            await cache.set(cache_key, report)
+            return report
         except Exception as e:
-            print(f"LLM Error: {e}")
-            return {"error": f"AI analysis failed: {e}"}
\ No newline at end of file
+            logger.exception("LLM Error")
+            return {"error": f"AI analysis failed: {e}"}
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.services.aggregator_client import AggregatorClient
+from app.services.ensemble import ENSEMBLE_TIMEOUT_SECONDS, call_with_timeout, is_healthy
+
+logger = logging.getLogger(__name__)
+
+# How long the primary models get before the backup model is raced against them
+HEDGE_DELAY_SECONDS = 0.8
+
+
+class ModelPool:
+    """
+    Runs the same fit-report request against several LLM clients concurrently
+    and synthesizes the surviving reports into one final report.
+    A slow or failing provider never blocks the others.
+    """
+
+    def __init__(
+            self,
+            clients: List[Any],
+            aggregator: Optional[AggregatorClient] = None,
+            per_model_limit: int = 4,
+            backup_client: Optional[Any] = None,
+            min_reports: int = 2,
+            timeout: float = ENSEMBLE_TIMEOUT_SECONDS,
+            hedge_delay: float = HEDGE_DELAY_SECONDS
+        ):
+        """
+        Initializes the pool.
+        Args:
+            clients (List[Any]): Clients exposing `generate_summary_from_github_data`.
+            aggregator (Optional[AggregatorClient]): Synthesizer for the collected reports.
+            per_model_limit (int): Maximum concurrent in-flight requests per client.
+            backup_client (Optional[Any]): Client raced in when `min_reports` haven't arrived after `hedge_delay`.
+            min_reports (int): Number of healthy reports wanted before synthesis.
+            timeout (float): Per-client deadline in seconds.
+            hedge_delay (float): Seconds to wait for the primary clients before launching the backup.
+        """
+        self.members = [(client, asyncio.Semaphore(per_model_limit)) for client in clients]
+        self.aggregator = aggregator or AggregatorClient()
+        self.backup = (backup_client, asyncio.Semaphore(per_model_limit)) if backup_client else None
+        self.min_reports = min_reports
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+
+    async def _run_one(self, client: Any, semaphore: asyncio.Semaphore, **kwargs) -> Dict[str, Any]:
+        """
+        Calls a single client, with a deadline, while holding its concurrency slot.
+        """
+        async with semaphore:
+            return await call_with_timeout(client, self.timeout, **kwargs)
+
+    async def collect_reports(self, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Launches every client at once and returns as soon as `min_reports` healthy reports
+        have arrived, cancelling the rest, so one slow provider doesn't set the latency.
+        The backup client is hedged in if that hasn't happened within `hedge_delay`
+        or once every primary client has finished short of it.
+        Args:
+            **kwargs: Arguments forwarded to `generate_summary_from_github_data`.
+        Returns:
+            List[Dict[str, Any]]: Healthy reports, in completion order.
+        """
+        loop = asyncio.get_running_loop()
+        pending = {asyncio.ensure_future(self._run_one(client, semaphore, **kwargs)) for client, semaphore in self.members}
+        hedge_at = loop.time() + self.hedge_delay
+        hedged = self.backup is None
+        reports: List[Dict[str, Any]] = []
+        try:
+            while len(reports) < self.min_reports and (pending or not hedged):
+                wait_for = None if hedged else max(0.0, hedge_at - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.warning("Model failed: %r", task.exception())
+                    elif is_healthy(task.result()):
+                        reports.append(task.result())
+
+                # Hedge: race the backup model once the primaries are late or exhausted
+                if self.backup and not hedged and len(reports) < self.min_reports and (not pending or loop.time() >= hedge_at):
+                    pending.add(asyncio.ensure_future(self._run_one(*self.backup, **kwargs)))
+                    hedged = True
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return reports
+
+    async def run_all(self, **kwargs) -> Dict[str, Any]:
+        """
+        Collects reports from all clients and synthesizes them.
+        Args:
+            **kwargs: Arguments forwarded to `generate_summary_from_github_data`.
+        Returns:
+            Dict[str, Any]: The synthesized report, or an error dictionary.
+        """
+        reports = await self.collect_reports(**kwargs)
+        return await self.aggregator.synthesize_reports(reports)
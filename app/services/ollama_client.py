@@ -1,8 +1,15 @@
+import logging
 import ollama
-import json
+import orjson
 from typing import Dict, Any, Optional
 
+from app import cache
+from app.schemas import FitReport
+from app.services.http_pool import POOL_LIMITS
 from app.services.llm_client import SYSTEM_PROMPT 
+from app.services.prompt_utils import build_github_context, format_sectioned_message
+
+logger = logging.getLogger(__name__)
 
 class OllamaClient:
     """
@@ -15,10 +22,10 @@ class OllamaClient:
         """
         try:
             # Connects to http://localhost:11434 by default
-            self.client = ollama.AsyncClient()
+            self.client = ollama.AsyncClient(limits=POOL_LIMITS)
             self.model = "mistral:latest"
         except Exception as e:
-            print(f"Error configuring Ollama client: {e}")
+            logger.error("Error configuring Ollama client: %s", e)
             self.client = None
 
     async def generate_summary_from_github_data(
@@ -28,36 +35,30 @@ class OllamaClient:
             readmes: dict,
             job_description: str,
             resume_text: str,
-            linkedin_text: Optional[str] = None
+            linkedin_text: Optional[str] = None,
+            quantitative_scores: Optional[Dict[str, Any]] = None,
+            job_embedding: Optional[Any] = None,
+            project_id: Optional[int] = None
         ) -> Dict[str, Any]:
         """
         Generates a structured JSON fit report using the local Ollama API.
+        job_embedding and project_id are LLMClient's semantic cache key inputs; they are accepted
+        (and ignored) so ModelPool can pass every client the same arguments.
         """
         if not self.client:
             return {"error": "Ollama client is not configured."}
 
         #  Build the user message
-        github_context = f"GitHub Profile Bio: {profile.get('bio', 'Not provided.')}\n\n"
-        github_context += "Top Repositories (by stars):\n"
-        for repo in repos[:5]:
-            repo_name = repo.get('name', 'N/A')
-            description = repo.get('description', 'No description.')
-            language = repo.get('language', 'N/A')
-            stars = repo.get('stargazers_count', 0)
-            readme = readmes.get(repo_name, "No README found.")
-            github_context += f"\n---\nRepo: {repo_name}\nPrimary Language: {language}\nStars: {stars}\nDescription: {description}\nREADME Summary (first 1500 chars): {readme[:1500]}\n---\n"
+        github_context = build_github_context(profile, repos, readmes)
         
-        user_message_segments = [
-            "--- JOB DESCRIPTION ---", job_description,
-            "--- CANDIDATE RESUME TEXT ---", resume_text
-        ]
-        if linkedin_text:
-            user_message_segments.extend(["--- CANDIDATE LINKEDIN TEXT ---", linkedin_text])
-        user_message_segments.extend([
-            "--- CANDIDATE GITHUB DATA ---", github_context,
-            "--- ANALYSIS ---", "Please generate the JSON fit report based on the rules. Start your response with {."
-        ])
-        user_message = "\n\n".join(user_message_segments)
+        scores_json = orjson.dumps(quantitative_scores, option=orjson.OPT_INDENT_2).decode() if quantitative_scores else None
+        user_message = format_sectioned_message(job_description, resume_text, github_context, linkedin_text, scores_json)
+
+        # Return a previous report for the identical prompt
+        cache_key = cache.make_key(self.model, SYSTEM_PROMPT, user_message)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
             response = await self.client.chat(
@@ -68,12 +69,13 @@ class OllamaClient:
                     {"role": "user", "content": user_message}
                 ]
             )
-            report = json.loads(response['message']['content'])
+            report = FitReport.model_validate_json(response['message']['content']).model_dump()
             report['model_source'] = 'Ollama (Mistral)' 
+            await cache.set(cache_key, report)
             return report
             
         except Exception as e:
             if "connection refused" in str(e).lower():
                  return {"error": "Ollama is not running. Please start the Ollama application on your computer."}
-            print(f"An error occurred while calling the Ollama API: {e}")
+            logger.exception("An error occurred while calling the Ollama API")
             return {"error": f"Error: Could not generate a summary from Ollama. {e}"}
\ No newline at end of file
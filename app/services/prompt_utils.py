@@ -0,0 +1,107 @@
+import functools
+import re
+from typing import Optional
+
+# Per-section prompt budgets (6000 in total), in estimated tokens of ~4 characters each
+JD_TOKENS = 2000
+RESUME_TOKENS = 2000
+GITHUB_TOKENS = 2000
+CHARS_PER_TOKEN = 4
+# JDs longer than their budget are summarized once per project instead of being cut off
+JD_SUMMARY_MIN_CHARS = JD_TOKENS * CHARS_PER_TOKEN
+
+# Characters of each cleaned README sent to the model
+README_CHARS = 1500
+# Fenced code blocks longer than this are dropped from READMEs
+MAX_CODE_FENCE_LINES = 30
+
+HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+CODE_FENCE_RE = re.compile(r"^(```|~~~).*?^\1[ \t]*$", re.M | re.S)
+# Linked badges ([![build](...)](...)), plain images and <img> tags carry no text worth tokens
+IMAGE_RE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)|!\[[^\]]*\]\([^)]*\)|<img\b[^>]*>", re.I)
+BOILERPLATE_SECTION_RE = re.compile(
+    r"^#{1,6}[ \t]*(?:licen[cs]e|contributing|contributors|code of conduct|acknowledg\w*)\b.*?(?=^#{1,6}[ \t]|\Z)",
+    re.M | re.S | re.I,
+)
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Sectioned user message shared by the GPT and Ollama clients; optional sections are
+# pre-rendered blocks (or "") so each request is a single format() call
+SECTIONED_MESSAGE_TEMPLATE = (
+    "--- JOB DESCRIPTION ---\n\n{jd}\n\n"
+    "--- CANDIDATE RESUME TEXT ---\n\n{resume}{linkedin_block}\n\n"
+    "--- CANDIDATE GITHUB DATA ---\n\n{github}{scores_block}\n\n"
+    "--- ANALYSIS ---\n\nPlease generate the JSON fit report based on the rules. Start your response with {{."
+)
+LINKEDIN_BLOCK_TEMPLATE = "\n\n--- CANDIDATE LINKEDIN TEXT ---\n\n{linkedin}"
+SCORES_BLOCK_TEMPLATE = "\n\n--- QUANTITATIVE SCORES ---\n\n{scores}"
+REPO_BLOCK_TEMPLATE = (
+    "\n---\nRepo: {name}\nPrimary Language: {language}\nStars: {stars}\n"
+    "Description: {description}\nREADME Summary (first 1500 chars): {readme}\n---\n"
+)
+
+def _drop_long_fence(match: re.Match) -> str:
+    block = match.group(0)
+    return "" if block.count("\n") > MAX_CODE_FENCE_LINES else block
+
+@functools.lru_cache(maxsize=1024)
+def clean_readme(text: str) -> str:
+    """
+    Strips README boilerplate (HTML comments, long code blocks, badges/images,
+    license and contributing sections) so the character budget goes to the description.
+    Results are memoized, since the same READMEs recur across re-screens.
+    """
+    text = HTML_COMMENT_RE.sub("", text)
+    text = CODE_FENCE_RE.sub(_drop_long_fence, text)
+    text = IMAGE_RE.sub("", text)
+    text = BOILERPLATE_SECTION_RE.sub("", text)
+    return BLANK_LINES_RE.sub("\n\n", text).strip()
+
+def build_github_context(profile: dict, repos: list, readmes: dict) -> str:
+    """
+    Renders the bio and top five repositories (with cleaned README excerpts) for the sectioned message.
+    The pieces are collected and joined once, and the result is kept within GITHUB_TOKENS.
+    """
+    github_parts = [
+        "GitHub Profile Bio: ", str(profile.get('bio', 'Not provided.')), "\n\n",
+        "Top Repositories (by stars):\n",
+    ]
+    github_parts.extend(
+        REPO_BLOCK_TEMPLATE.format(
+            name=repo.get('name', 'N/A'),
+            language=repo.get('language', 'N/A'),
+            stars=repo.get('stargazers_count', 0),
+            description=repo.get('description', 'No description.'),
+            readme=clean_readme(readmes.get(repo.get('name', 'N/A'), "No README found."))[:README_CHARS],
+        )
+        for repo in repos[:5]
+    )
+    return truncate_to_tokens("".join(github_parts), GITHUB_TOKENS)
+
+def format_sectioned_message(
+        job_description: str,
+        resume_text: str,
+        github_context: str,
+        linkedin_text: Optional[str] = None,
+        scores_json: Optional[str] = None
+    ) -> str:
+    """
+    Renders SECTIONED_MESSAGE_TEMPLATE, budgeting the JD and resume and leaving out empty optional sections.
+    """
+    return SECTIONED_MESSAGE_TEMPLATE.format(
+        jd=truncate_to_tokens(job_description, JD_TOKENS),
+        resume=truncate_to_tokens(resume_text, RESUME_TOKENS),
+        linkedin_block=LINKEDIN_BLOCK_TEMPLATE.format(linkedin=linkedin_text) if linkedin_text else "",
+        github=github_context,
+        scores_block=SCORES_BLOCK_TEMPLATE.format(scores=scores_json) if scores_json else "",
+    )
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts text to roughly max_tokens tokens, preferring a line break near the cut.
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", limit - limit // 10, limit)
+    return text[:cut if cut > 0 else limit]
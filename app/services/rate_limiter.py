@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tokens added to a prompt's size estimate to cover the system prompt and the response
+TOKEN_OVERHEAD = 1500
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for a prompt: ~4 characters per token plus a fixed overhead.
+    """
+    return len(text) // 4 + TOKEN_OVERHEAD
+
+class AsyncLimiter:
+    """
+    A token-bucket limiter enforcing both requests and tokens per minute.
+    Buckets refill continuously and are topped up lazily on each acquire,
+    so there is no background task to start or stop.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Initializes both buckets full.
+        Args:
+            requests_per_minute (int): Maximum requests started per rolling minute.
+            tokens_per_minute (int): Maximum estimated tokens sent per rolling minute.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated if self._updated else 0.0
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Waits until one request and `tokens` tokens are available, then takes them.
+        A request larger than the whole per-minute budget waits for a full bucket.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        loop = asyncio.get_running_loop()
+        # Waiters queue on the lock, so requests are admitted in arrival order
+        async with self._lock:
+            while True:
+                self._refill(loop.time())
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.requests_per_minute,
+                    (tokens - self._tokens) * 60 / self.tokens_per_minute,
+                )
+                await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def reserve(self, tokens: int = 0):
+        """
+        `async with limiter.reserve(n): ...` runs the body once capacity for n tokens is available.
+        """
+        await self.acquire(tokens)
+        yield
+
+async def call_with_retries(
+        call: Callable[[], Awaitable[T]],
+        retry_on: Tuple[Type[BaseException], ...],
+        attempts: int = 3,
+        base_delay: float = 1.0
+    ) -> T:
+    """
+    Awaits call(), retrying on the given exceptions with jittered exponential backoff.
+    Args:
+        call (Callable[[], Awaitable[T]]): Zero-argument coroutine factory; invoked once per attempt.
+        retry_on (Tuple[Type[BaseException], ...]): Exceptions worth retrying (rate limits, timeouts).
+        attempts (int): Total attempts, including the first.
+        base_delay (float): Delay before the first retry in seconds; doubles each retry.
+    Returns:
+        T: The result of the first successful attempt.
+    Raises:
+        The last exception once attempts are exhausted, or any exception not in retry_on.
+    """
+    for attempt in range(attempts - 1):
+        try:
+            return await call()
+        except retry_on as e:
+            delay = base_delay * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning("Retrying in %.1fs after %s", delay, type(e).__name__)
+            await asyncio.sleep(delay)
+    return await call()
+
+def limiter_from_env(prefix: str, requests_per_minute: int, tokens_per_minute: int) -> AsyncLimiter:
+    """
+    Builds a limiter from {prefix}_RPM / {prefix}_TPM environment variables, falling back to the given defaults.
+    """
+    return AsyncLimiter(
+        int(os.getenv(f"{prefix}_RPM", requests_per_minute)),
+        int(os.getenv(f"{prefix}_TPM", tokens_per_minute)),
+    )
@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+import zlib
+import numpy as np
+import orjson
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.analysis.jit import NUMBA_AVAILABLE, njit
+from app.analysis.patterns import WORD_RE
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate JD/resume pairs reuse a previous report instead of calling the LLM; off by default,
+# since a hashed bag of words can't tell apart texts that differ only in a few words
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", os.path.join(os.getenv("LLM_CACHE_DIR", "./.llm_cache"), "semantic"))
+SIMILARITY_THRESHOLD = 0.95
+# Entries kept before the oldest are evicted
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+
+# Hashed bag-of-words dimensions per field, and each field's weight in the key vector
+EMBEDDING_DIM = 1024
+FIELD_WEIGHTS = (0.5, 0.35, 0.15)
+KEY_DIM = EMBEDDING_DIM * len(FIELD_WEIGHTS)
+# Only the head of a resume goes into the key; its tail is mostly boilerplate
+RESUME_KEY_CHARS = 4000
+
+def _embed_text(text: str) -> np.ndarray:
+    """
+    Embeds text as an L2-normalized, log-scaled hashed bag of words.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in WORD_RE.findall(text.lower()):
+        h = zlib.crc32(token.encode('utf-8'))
+        # The top bit picks the sign so colliding tokens tend to cancel rather than add up
+        vector[h % EMBEDDING_DIM] += 1.0 if h & 0x80000000 else -1.0
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def embed_job_description(job_description: str) -> np.ndarray:
+    """
+    Embeds a job description alone, so a project can store it and skip re-embedding it per candidate.
+    """
+    return _embed_text(job_description)
+
+def embed(
+        job_description: str,
+        resume_text: str,
+        github_context: str,
+        job_vector: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+    """
+    Builds the cache key vector: the weighted concatenation of per-field embeddings, L2-normalized.
+    Args:
+        job_description (str): Job description text.
+        resume_text (str): Candidate resume text; only the first RESUME_KEY_CHARS are used.
+        github_context (str): The GitHub summary text sent to the model.
+        job_vector (Optional[np.ndarray]): embed_job_description(job_description), if already known.
+    Returns:
+        np.ndarray: Unit-length float32 vector.
+    """
+    field_vectors = (
+        _embed_text(job_description) if job_vector is None else job_vector,
+        _embed_text(resume_text[:RESUME_KEY_CHARS]),
+        _embed_text(github_context),
+    )
+    parts = [weight * vector for weight, vector in zip(FIELD_WEIGHTS, field_vectors)]
+    vector = np.concatenate(parts).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def cache_scope(username: str, project_id: Optional[int], quantitative_scores: Optional[Dict[str, Any]]) -> str:
+    """
+    The exact-match part of a cache key: a report can only be reused for the same candidate,
+    project and quantitative scores, whatever the similarity of the texts.
+    Args:
+        username (str): GitHub username.
+        project_id (Optional[int]): The project the candidate is scored for.
+        quantitative_scores (Optional[Dict[str, Any]]): The pre-calculated scores the report is based on.
+    Returns:
+        str: Hex digest identifying the scope.
+    """
+    payload = orjson.dumps([username, project_id, quantitative_scores], option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(payload).hexdigest()
+
+@njit(cache=True, fastmath=True)
+def _best_match_kernel(vectors: np.ndarray, vector: np.ndarray, rows: np.ndarray) -> Tuple[int, float]:
+    """
+    Row and inner product of the best of the given rows; no other row is scored.
+    """
+    best, best_score = -1, -1.0
+    for i in rows:
+        score = 0.0
+        for j in range(vectors.shape[1]):
+            score += vectors[i, j] * vector[j]
+        if score > best_score:
+            best, best_score = i, score
+    return best, best_score
+
+def best_match(vectors: np.ndarray, vector: np.ndarray, rows: np.ndarray) -> Tuple[int, float]:
+    """
+    Finds which of the given rows of vectors has the highest inner product against vector.
+    Args:
+        vectors (np.ndarray): (n, d) float32 index.
+        vector (np.ndarray): (d,) float32 query.
+        rows (np.ndarray): int64 indices of the rows that may match.
+    Returns:
+        Tuple[int, float]: (row, score), or (-1, -1.0) if rows is empty.
+    """
+    if not len(rows):
+        return -1, -1.0
+    if NUMBA_AVAILABLE:
+        return _best_match_kernel(vectors, vector, rows)
+    similarities = vectors[rows] @ vector
+    best = int(np.argmax(similarities))
+    return int(rows[best]), float(similarities[best])
+
+class SemanticCache:
+    """
+    A bounded inner-product index over key vectors, with one JSON report per entry.
+    In memory the index is a ring buffer of up to max_entries rows, so adding past the limit
+    overwrites (and evicts) the oldest entry. On disk it is an append-only log of raw vector rows
+    and JSON entry lines, compacted down to the live entries once it grows past twice the limit.
+    """
+
+    def __init__(
+            self,
+            directory: str = SEMANTIC_CACHE_DIR,
+            threshold: float = SIMILARITY_THRESHOLD,
+            max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES
+        ):
+        """
+        Replays any previously persisted log from directory, keeping its newest max_entries entries.
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._entries_path = os.path.join(directory, "entries.jsonl")
+        self._reports_dir = os.path.join(directory, "reports")
+        self._lock = asyncio.Lock()
+        self._vectors = np.zeros((0, KEY_DIM), dtype=np.float32)
+        # Slot-aligned with the rows of _vectors: {"id": report file id, "scope": cache_scope(...)}
+        self._entries: List[Dict[str, str]] = []
+        # Live slots per scope, oldest first
+        self._rows: Dict[str, Deque[int]] = {}
+        # Slot the next add fills once the buffer is full (the oldest entry's)
+        self._next = 0
+        # Rows in the on-disk log, live or evicted
+        self._logged = 0
+        try:
+            vectors, entries, intact = self._read_log()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning("Semantic cache could not be loaded, starting empty: %s", e)
+            return
+        for vector, entry in zip(vectors[-self.max_entries:], entries[-self.max_entries:]):
+            self._insert(vector, entry)
+        self._logged = len(entries)
+        # A torn tail from a crash would misalign later appends, so rewrite the log without it
+        if not intact or self._logged > 2 * self.max_entries:
+            try:
+                self._compact()
+            except Exception as e:
+                logger.warning("Semantic cache log could not be compacted: %s", e)
+
+    async def lookup(self, vector: np.ndarray, scope: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the report of the most similar previous request in the same scope
+        if its cosine similarity is at least the threshold, else None.
+        Matches are restricted to the scope so one person's report is never served for another,
+        nor for another project or a changed set of quantitative scores.
+        """
+        if not SEMANTIC_CACHE_ENABLED or scope not in self._rows:
+            return None
+        # Held so an add can't overwrite a slot while it's being scored
+        async with self._lock:
+            rows = np.fromiter(self._rows.get(scope, ()), dtype=np.int64)
+            best, score = await asyncio.to_thread(best_match, self._vectors, vector, rows)
+            if best < 0 or score < self.threshold:
+                return None
+            entry_id = self._entries[best]["id"]
+        try:
+            report = await asyncio.to_thread(self._read_report, entry_id)
+        except Exception:
+            return None
+        report["model_source"] = "SemanticCache"
+        return report
+
+    async def add(self, vector: np.ndarray, scope: str, report: Dict[str, Any]) -> None:
+        """
+        Adds a request vector and its report to the index, evicting the oldest entry when full,
+        and appends both to the on-disk log.
+        """
+        if not SEMANTIC_CACHE_ENABLED:
+            return
+        async with self._lock:
+            entry = {"id": uuid.uuid4().hex, "scope": scope}
+            evicted = self._insert(vector, entry)
+            try:
+                await asyncio.to_thread(self._persist, entry, vector, report, evicted)
+            except Exception as e:
+                logger.warning("Semantic cache could not be persisted: %s", e)
+
+    def _insert(self, vector: np.ndarray, entry: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Puts an entry in the next free slot, or the oldest entry's once full; returns the evicted entry.
+        """
+        evicted = None
+        if len(self._entries) < self.max_entries:
+            slot = len(self._entries)
+            if slot == len(self._vectors):
+                # Grow by doubling rather than reallocating on every add
+                grown = np.zeros((min(max(2 * slot, 16), self.max_entries), KEY_DIM), dtype=np.float32)
+                grown[:slot] = self._vectors
+                self._vectors = grown
+            self._entries.append(entry)
+        else:
+            slot = self._next
+            self._next = (slot + 1) % self.max_entries
+            evicted = self._entries[slot]
+            # The oldest slot overall is also the oldest of its scope's
+            scope_rows = self._rows[evicted["scope"]]
+            scope_rows.popleft()
+            if not scope_rows:
+                del self._rows[evicted["scope"]]
+            self._entries[slot] = entry
+        self._vectors[slot] = vector
+        self._rows.setdefault(entry["scope"], deque()).append(slot)
+        return evicted
+
+    def _live_entries(self) -> Tuple[np.ndarray, List[Dict[str, str]]]:
+        """
+        The live vectors and entries, oldest first.
+        """
+        order = [(slot + self._next) % len(self._entries) for slot in range(len(self._entries))]
+        return self._vectors[order], [self._entries[slot] for slot in order]
+
+    def _read_log(self) -> Tuple[np.ndarray, List[Dict[str, str]], bool]:
+        """
+        Reads the on-disk log as (vectors, entries, intact); intact is False if a crash mid-append
+        left a partial row, a torn entry line, or a vector without its entry.
+        """
+        with open(self._vectors_path, "rb") as f:
+            raw = f.read()
+        row_bytes = KEY_DIM * 4
+        vectors = np.frombuffer(raw[:len(raw) - len(raw) % row_bytes], dtype=np.float32).reshape(-1, KEY_DIM)
+        entries = []
+        intact = len(raw) % row_bytes == 0
+        with open(self._entries_path, "rb") as f:
+            for line in f:
+                try:
+                    entries.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    # A torn line can only be the last one
+                    intact = False
+                    break
+        # Vectors are appended first, so every complete entry line has its row
+        entries = entries[:len(vectors)]
+        return vectors, entries, intact and len(entries) == len(vectors)
+
+    def _read_report(self, entry_id: str) -> Dict[str, Any]:
+        with open(os.path.join(self._reports_dir, f"{entry_id}.json"), "rb") as f:
+            return orjson.loads(f.read())
+
+    def _persist(
+            self,
+            entry: Dict[str, str],
+            vector: np.ndarray,
+            report: Dict[str, Any],
+            evicted: Optional[Dict[str, str]]
+        ) -> None:
+        os.makedirs(self._reports_dir, exist_ok=True)
+        with open(os.path.join(self._reports_dir, f"{entry['id']}.json"), "wb") as f:
+            f.write(orjson.dumps(report))
+        if evicted is not None:
+            try:
+                os.remove(os.path.join(self._reports_dir, f"{evicted['id']}.json"))
+            except FileNotFoundError:
+                pass
+        if self._logged + 1 > 2 * self.max_entries:
+            # The in-memory index already holds the new entry
+            self._compact()
+            return
+        with open(self._vectors_path, "ab") as f:
+            f.write(vector.astype(np.float32).tobytes())
+        with open(self._entries_path, "ab") as f:
+            f.write(orjson.dumps(entry) + b"\n")
+        self._logged += 1
+
+    def _compact(self) -> None:
+        """
+        Rewrites the log with only the live entries; write-then-rename so a crash never truncates it.
+        """
+        vectors, entries = self._live_entries()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._vectors_path + ".tmp", "wb") as f:
+            f.write(vectors.astype(np.float32).tobytes())
+        with open(self._entries_path + ".tmp", "wb") as f:
+            f.write(b"".join(orjson.dumps(entry) + b"\n" for entry in entries))
+        os.replace(self._vectors_path + ".tmp", self._vectors_path)
+        os.replace(self._entries_path + ".tmp", self._entries_path)
+        self._logged = len(entries)
+
+# Loaded once at process start and shared by the LLM clients
+semantic_cache = SemanticCache()
@@ -1,34 +1,56 @@
+import logging
 import os
-import json
+import hashlib
+import heapq
+import numpy as np
+import orjson
 import secrets
 import asyncio
+import filecmp
+import glob
 import io
-from typing import List, Optional, Dict, Any
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterable, List, Optional, Dict, Any, Tuple, Union
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Form, File, UploadFile
+from fastapi import Depends, FastAPI, HTTPException, Form, File, Header, UploadFile
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse, Response
 from pydantic import BaseModel
-from sqlmodel import Session, select
-from pypdf import PdfReader, PdfWriter
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import pymupdf
+from pypdf import PdfWriter
 from fpdf import FPDF
-from sqlalchemy import desc
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 # Import core logic modules
+from app.analysis.document import parse
 from app.analysis.skill_extractor import calculate_technical_match
 from app.analysis.github_metrics import calculate_complexity_score
 from app.analysis.experience_calculator import calculate_experience_score
-from app.analysis.domain_analyzer import calculate_domain_relevance
+from app.analysis.domain_analyzer import build_idf, calculate_domain_relevance
 from app.analysis.scoring_engine import calculate_hybrid_score, generate_audit_trail
 
 # Import clients & DB
+from app.services import http_pool
 from app.services.github_client import GitHubClient
+from app.services.gpt_client import GPTClient
 from app.services.llm_client import LLMClient
-from app.database import engine, create_db_and_tables
+from app.services.model_pool import ModelPool
+from app.services.ollama_client import OllamaClient
+from app.services.semantic_cache import embed_job_description
+from app.database import async_engine, create_db_and_tables, dialect_insert
 from app.models import Project, Candidate
+from app.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
+log_listener = setup_logging()
 
 # Setup
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -36,10 +58,26 @@ STATIC_DIR = os.path.join(BASE_DIR, "static")
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 REPORTS_DIR = os.path.join(BASE_DIR, "generated_reports")
 os.makedirs(REPORTS_DIR, exist_ok=True)
+# Characters of text kept from an uploaded PDF (resumes rarely exceed a few thousand)
+PDF_TEXT_LIMIT = 20_000
+# Generated download PDFs are cached in this subfolder of REPORTS_DIR
+REPORT_PDF_CACHE_DIRNAME = "_pdf_cache"
+# Uploads are copied from their spooled temp files in chunks of this size
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Inserts that lose a unique-index race are retried this many times in total
+CANDIDATE_WRITE_ATTEMPTS = 3
 
 app = FastAPI()
 github_client = GitHubClient()
 llm_client = LLMClient()
+# ENSEMBLE_ENABLED=1 also asks GPT and the local Ollama model, and merges their reports with Gemini's
+ENSEMBLE_ENABLED = os.getenv("ENSEMBLE_ENABLED") == "1"
+model_pool = ModelPool([llm_client, GPTClient(), OllamaClient()]) if ENSEMBLE_ENABLED else None
+# The JD IDF table and the (project count, max project id) it was built for; projects are only ever
+# added, so that pair changes whenever the corpus does, even if another worker added the project
+jd_idf: Tuple[Optional[Tuple[int, Optional[int]]], Dict[str, float]] = (None, {})
+# PDF text extraction is CPU-bound; it runs here so it never blocks the event loop
+PDF_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 app.mount("/reports", StaticFiles(directory=REPORTS_DIR), name="reports")
@@ -48,26 +86,135 @@ app.mount("/reports", StaticFiles(directory=REPORTS_DIR), name="reports")
 def on_startup():
     create_db_and_tables()
 
-def get_session():
-    with Session(engine) as session:
+@app.on_event("shutdown")
+async def on_shutdown():
+    await github_client.aclose()
+    await http_pool.aclose()
+    await async_engine.dispose()
+    PDF_POOL.shutdown(cancel_futures=True)
+    log_listener.stop()
+
+async def get_session():
+    # Loaded attributes stay valid after commit, so responses never trigger a lazy (sync) reload
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
 # PDF parser helper
-def parse_pdf_resume(file_contents: bytes) -> str:
+def parse_pdf_resume(source: Union[bytes, str]) -> str:
     '''
-    Extract text from PDF bytes.
+    Extract text from a PDF, given its bytes or a file path.
     
     Args:
-        file_contents (bytes): PDF file content in bytes.
+        source (Union[bytes, str]): PDF file content in bytes, or the path of a PDF file.
     
     returns: str
     '''
     try:
-        reader = PdfReader(io.BytesIO(file_contents))
-        return "\n".join([page.extract_text() or "" for page in reader.pages]).strip()
-    except Exception as e:
-        print(f"PDF Error: {e}")
+        # PyMuPDF (MuPDF's C parser) reads the bytes or the file directly, no BytesIO needed
+        if isinstance(source, str):
+            doc = pymupdf.open(source, filetype="pdf")
+        else:
+            doc = pymupdf.open(stream=source, filetype="pdf")
+    except Exception:
+        logger.exception("PDF Error")
+        return ""
+    try:
+        # Pages are extracted lazily; stop once there is more text than anything downstream reads
+        parts = []
+        total = 0
+        for page in doc.pages():
+            text = page.get_text()
+            parts.append(text)
+            total += len(text) + 1
+            if total >= PDF_TEXT_LIMIT:
+                break
+        return "\n".join(parts)[:PDF_TEXT_LIMIT].strip()
+    except Exception:
+        logger.exception("PDF Error")
         return ""
+    finally:
+        doc.close()
+
+async def parse_pdf_resume_async(source: Union[bytes, str]) -> str:
+    '''
+    Extract text from a PDF in the PDF process pool. Passing a path
+    keeps the PDF bytes from being pickled over to the worker process.
+
+    Args:
+        source (Union[bytes, str]): PDF file content in bytes, or the path of a PDF file.
+
+    returns: str
+    '''
+    return await asyncio.get_running_loop().run_in_executor(PDF_POOL, parse_pdf_resume, source)
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+async def write_file_async(path: str, data: bytes) -> None:
+    '''
+    Write bytes to a file in a worker thread so the event loop keeps serving requests.
+
+    Args:
+        path (str): Destination file path.
+        data (bytes): File content.
+    '''
+    await asyncio.to_thread(_write_bytes, path, data)
+
+def _save_upload(upload: BinaryIO, path: str) -> int:
+    upload.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(upload, f, UPLOAD_CHUNK_BYTES)
+        return f.tell()
+
+async def save_upload_async(upload: UploadFile, path: str) -> int:
+    '''
+    Copy an upload's spooled temp file to path in a worker thread,
+    without reading the whole file into memory.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+        path (str): Destination file path.
+
+    returns: int, the number of bytes written
+    '''
+    return await asyncio.to_thread(_save_upload, upload.file, path)
+
+def report_pdf_cache_path(candidate: Candidate, attachments: List[str]) -> str:
+    '''
+    Path of the cached download PDF for a candidate and the files appended to it.
+    The key covers the size and mtime of the report JSON and of each attachment, so a
+    re-analysis or re-upload yields a new path; analyze_candidate also removes the old ones.
+
+    Args:
+        candidate (Candidate): Candidate ORM object.
+        attachments (List[str]): Paths of the PDFs appended after the report.
+
+    returns: str
+    '''
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{candidate.final_score}".encode())
+    for path in [candidate.report_file_path, *attachments]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # A missing report renders as an empty one
+            hasher.update(f"\x00{path}:missing".encode())
+            continue
+        hasher.update(f"\x00{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    cache_dir = os.path.join(REPORTS_DIR, REPORT_PDF_CACHE_DIRNAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f"{candidate.id}-{hasher.hexdigest()}.pdf")
+
+def discard_files(paths: Iterable[str]) -> None:
+    '''
+    Delete the given files, ignoring any that are already gone.
+    '''
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
     
 
 # PDF Generation Helper
@@ -102,6 +249,17 @@ class PDFReport(FPDF):
         self.multi_cell(0, 5, body)
         self.ln()
 
+    def chapter_list(self, items, marker):
+        '''
+        Add a bulleted list to the PDF as a single text block,
+        rather than one cell and line break per item.
+
+        Args:
+            items (list): The list items.
+            marker (str): The bullet prefix, e.g. "-".'''
+        if items:
+            self.chapter_body("\n".join(f"{marker} {item}" for item in items))
+
 def generate_report_pdf(candidate: Candidate, full_data: dict) -> bytes:
     '''
     Generate a PDF report for the candidate.
@@ -113,6 +271,7 @@ def generate_report_pdf(candidate: Candidate, full_data: dict) -> bytes:
     returns: bytes
     '''
     pdf = PDFReport()
+    pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
     
     # Header Info
@@ -145,60 +304,68 @@ def generate_report_pdf(candidate: Candidate, full_data: dict) -> bytes:
     if not strengths:
         pdf.chapter_body("No specific strengths highlighted.")
     else:
-        for item in strengths:
-            pdf.chapter_body(f"- {item}")
+        pdf.chapter_list(strengths, "-")
     
     # 5. Red Flags & Weaknesses
     pdf.chapter_title("Red Flags & Weaknesses")
     
     # Red Flags
     red_flags = full_data.get("red_flags", [])
-    for item in red_flags:
-        pdf.chapter_body(f"[!] {item}")
+    pdf.chapter_list(red_flags, "[!]")
         
     # Weaknesses
     weaknesses = full_data.get("weak_evidence", []) or full_data.get("role_weaknesses", [])
-    for item in weaknesses:
-        pdf.chapter_body(f"- {item}")
+    pdf.chapter_list(weaknesses, "-")
         
     # Missing Skills
     missing = full_data.get("missing_skills", [])
     if missing:
         pdf.chapter_body("Missing Skills:")
-        for item in missing:
-            pdf.chapter_body(f" [x] {item}")
+        pdf.chapter_list(missing, " [x]")
 
     # 6. Interview Questions
     pdf.chapter_title("Suggested Interview Questions")
-    for q in full_data.get("interview_questions", []):
-        pdf.chapter_body(f"? {q}")
+    pdf.chapter_list(full_data.get("interview_questions", []), "?")
 
     return bytes(pdf.output())
 
+def load_template(name: str) -> Optional[bytes]:
+    '''
+    Read an HTML template from TEMPLATES_DIR.
+
+    Args:
+        name (str): Template file name.
+
+    returns: bytes, or None if the file doesn't exist
+    '''
+    try:
+        with open(os.path.join(TEMPLATES_DIR, name), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+# Templates don't change at runtime, so they are read once instead of on every page load
+INDEX_HTML = load_template("index.html")
+REPORT_HTML = load_template("report.html")
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
     '''
     Serve the main HTML page.
     '''
-    html_file_path = os.path.join(TEMPLATES_DIR, "index.html")
-    try:
-        with open(html_file_path) as f:
-            return HTMLResponse(content=f.read(), status_code=200)
-    except FileNotFoundError:
+    if INDEX_HTML is None:
         raise HTTPException(status_code=404, detail="index.html not found.")
+    return HTMLResponse(content=INDEX_HTML, status_code=200)
     
 @app.get("/report_view", response_class=HTMLResponse)
 async def read_report_view():
     '''
     Serve the report view HTML page.
     '''
-    html_file_path = os.path.join(TEMPLATES_DIR, "report.html")
-    try:
-        with open(html_file_path) as f:
-            return HTMLResponse(content=f.read(), status_code=200)
-    except FileNotFoundError:
+    if REPORT_HTML is None:
         raise HTTPException(status_code=404, detail="report.html not found.")
+    return HTMLResponse(content=REPORT_HTML, status_code=200)
 
 # Project management endpoints
 class ProjectCreate(BaseModel):
@@ -209,29 +376,42 @@ class ProjectCreate(BaseModel):
     job_description: str
     
 @app.post("/projects/", response_model=Project)
-def create_project(project_data: ProjectCreate, session: Session = Depends(get_session)):
+async def create_project(project_data: ProjectCreate, session: AsyncSession = Depends(get_session)):
     '''
-    Create a new project.
+    Create a new project. The JD is embedded (and summarized, if over-long) here once
+    rather than for every candidate screened against it.
     '''
-    db_project = Project(name=project_data.name, job_description=project_data.job_description)
+    # The embedding is CPU-bound, so it runs in a worker thread while the summary call is awaited
+    jd_summary, jd_embedding = await asyncio.gather(
+        llm_client.summarize_job_description(project_data.job_description),
+        asyncio.to_thread(embed_job_description, project_data.job_description)
+    )
+    db_project = Project(
+        name=project_data.name,
+        job_description=project_data.job_description,
+        jd_summary=jd_summary,
+        jd_embedding=jd_embedding.tobytes()
+    )
     session.add(db_project)
-    session.commit()
-    session.refresh(db_project)
+    await session.commit()
+    await session.refresh(db_project)
+    # The new JD changes every word's IDF; rebuild it now rather than in the next analysis
+    await project_idf(session)
     return db_project
 
-@app.get("/projects/")
-def list_projects(session: Session = Depends(get_session)):
+@app.get("/projects/", response_model=List[Project])
+async def list_projects(session: AsyncSession = Depends(get_session)):
     '''
     List all projects.
     '''
-    return session.exec(select(Project)).all()
+    return (await session.exec(select(Project))).all()
 
-@app.get("/projects/{project_id}/candidates/")
-def list_candidates(project_id: int, session: Session = Depends(get_session)):
+@app.get("/projects/{project_id}/candidates/", response_model=List[Candidate])
+async def list_candidates(project_id: int, session: AsyncSession = Depends(get_session)):
     '''
     List all candidates for a given project, ordered by final score descending.
     '''
-    return session.exec(select(Candidate).where(Candidate.project_id == project_id).order_by(desc(Candidate.final_score))).all()
+    return (await session.exec(select(Candidate).where(Candidate.project_id == project_id).order_by(col(Candidate.final_score).desc()))).all()
 
 
 @app.get("/projects/{project_id}/candidates/{candidate_id}/download")
@@ -240,7 +420,8 @@ async def download_candidate_report(
     candidate_id: int,
     include_resume: bool = False,
     include_linkedin: bool = False,
-    session: Session = Depends(get_session)
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session)
 ):
     
     '''
@@ -250,56 +431,160 @@ async def download_candidate_report(
         candidate_id (int): The ID of the candidate.
         include_resume (bool): Whether to include the resume PDF.
         include_linkedin (bool): Whether to include the LinkedIn PDF.
-        session (Session): Database session.
+        if_none_match (Optional[str]): ETags of copies the client already has.
+        session (AsyncSession): Database session.
         
-    returns: Response
+    returns: FileResponse, or an empty 304 Response if the client's copy is current
 
     '''
 
     # Fetch candidate
-    candidate = session.get(Candidate, candidate_id)
+    candidate = await session.get(Candidate, candidate_id)
     if not candidate:
         raise HTTPException(404, "Candidate not found")
-    
-    # Load the full JSON report
-    try:
-        with open(candidate.report_file_path, "r") as f:
-            full_data = json.load(f)
-    except:
-        full_data = {}
 
-    # Generate the AI Report PDF
-    report_pdf_bytes = generate_report_pdf(candidate, full_data)
-    
-    # Merge with other files if requested
-    merger = PdfWriter()
-    
-    # Add Report
-    merger.append(io.BytesIO(report_pdf_bytes))
-    
-    # Add Resume
-    if include_resume:
-        resume_path = os.path.join(os.path.dirname(candidate.report_file_path), "resume.pdf")
-        if os.path.exists(resume_path):
-            merger.append(resume_path)
-            
-    # Add LinkedIn
-    if include_linkedin:
-        linkedin_path = os.path.join(os.path.dirname(candidate.report_file_path), "linkedin.pdf")
-        if os.path.exists(linkedin_path):
-            merger.append(linkedin_path)
-
-    # 3. Return final PDF
-    output_buffer = io.BytesIO()
-    merger.write(output_buffer)
-    merger.close()
-    
-    pdf_data = output_buffer.getvalue()
+    # Resume/LinkedIn files to append, if requested and present
+    attachments = []
+    if candidate.report_file_path:
+        folder = os.path.dirname(candidate.report_file_path)
+        if include_resume:
+            attachments.append(os.path.join(folder, "resume.pdf"))
+        if include_linkedin:
+            attachments.append(os.path.join(folder, "linkedin.pdf"))
+    attachments = [path for path in attachments if os.path.exists(path)]
+
+    # The merged PDF only depends on the candidate's report and the attached files,
+    # so repeat downloads are served from the copy generated the first time
+    pdf_path = report_pdf_cache_path(candidate, attachments)
+    # The cache key is derived from the content, so it doubles as the ETag; clients revalidate
+    # on every download and a current copy costs a 304 instead of the whole PDF
+    etag = f'"{os.path.splitext(os.path.basename(pdf_path))[0]}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=cache_headers)
+    if not os.path.exists(pdf_path):
+        # Load the full JSON report
+        try:
+            with open(candidate.report_file_path, "rb") as f:
+                full_data = orjson.loads(f.read())
+        except:
+            full_data = {}
+
+        # Generate the AI Report PDF
+        report_pdf_bytes = generate_report_pdf(candidate, full_data)
+
+        # Merge with the attachments
+        merger = PdfWriter()
+        merger.append(io.BytesIO(report_pdf_bytes))
+        for path in attachments:
+            merger.append(path)
+
+        # Written to a temp file and renamed into place, so a concurrent download never sees a partial PDF
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(pdf_path))
+        os.close(fd)
+        try:
+            await asyncio.to_thread(merger.write, tmp_path)
+            os.replace(tmp_path, pdf_path)
+        except Exception:
+            discard_files([tmp_path])
+            raise
+        finally:
+            merger.close()
+
+    # 3. Return final PDF, sent from disk (sendfile where available)
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=f"{candidate.github_username}_report.pdf",
+        headers=cache_headers
+    )
+
+async def fetch_github_data(username: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, str]]:
+    '''
+    Fetch a user's profile, repositories and top-repo READMEs
+    (single GraphQL round-trip, REST as fallback).
+
+    Args:
+        username (str): GitHub username.
+
+    returns: (profile or None, repos, top 5 repos by stars, READMEs of the top repos keyed by name)
+    '''
+    bundle = await github_client.fetch_bundle(username)
+    if bundle:
+        profile, repos = bundle["profile"], bundle["repos"]
+    else:
+        profile_task = github_client.get_user_profile(username)
+        repos_task = github_client.get_user_repos(username)
+        profile, repos = await asyncio.gather(profile_task, repos_task)
+    if not profile:
+        return None, [], [], {}
     
-    headers = {
-        'Content-Disposition': f'attachment; filename="{candidate.github_username}_report.pdf"'
-    }
-    return Response(content=pdf_data, media_type="application/pdf", headers=headers)
+    # Fetch READMEs for deeper context
+    top_repos = heapq.nlargest(5, repos, key=lambda r: r.get('stargazers_count', 0))
+    if bundle:
+        readmes = {repo['name']: bundle["readmes"][repo['name']] for repo in top_repos if repo['name'] in bundle["readmes"]}
+    else:
+        readmes_by_name = await github_client.get_readmes_bulk(
+            username,
+            [repo['name'] for repo in top_repos],
+            {repo['name']: repo.get('default_branch') for repo in top_repos}
+        )
+        readmes = {name: content for name, content in readmes_by_name.items() if content}
+    return profile, repos, top_repos, readmes
+
+def repos_text(repos: List[Dict[str, Any]]) -> str:
+    """
+    The skill-bearing fields of each repo (name, description, language, topics) as one text,
+    instead of the full API JSON with its URLs, owner objects and timestamps.
+    """
+    return " ".join(
+        f"{repo.get('name') or ''} {repo.get('description') or ''} {repo.get('language') or ''} {' '.join(repo.get('topics') or ())}"
+        for repo in repos
+    )
+
+async def project_idf(session: AsyncSession) -> Dict[str, float]:
+    '''
+    The IDF table over all project JDs, rebuilt only when the set of projects has changed.
+
+    Args:
+        session (AsyncSession): Database session.
+
+    returns: Dict[str, float]
+    '''
+    global jd_idf
+    count, max_id = (await session.exec(select(func.count(), func.max(Project.id)).select_from(Project))).one()
+    version = (count, max_id)
+    if version != jd_idf[0]:
+        job_descriptions = (await session.exec(select(Project.job_description))).all()
+        jd_idf = (version, await asyncio.to_thread(build_idf, job_descriptions))
+    return jd_idf[1]
+
+async def save_candidate(session: AsyncSession, candidate_data: Dict[str, Any]) -> Candidate:
+    '''
+    Insert or update a candidate with a single upsert on the (project_id, github_username) unique index:
+    a re-analysis updates the row in place (keeping its unique_id), and concurrent requests can't race.
+    Only a unique_id collision can still fail, and is retried with a fresh id.
+
+    Args:
+        session (AsyncSession): Database session.
+        candidate_data (Dict[str, Any]): Column values, without unique_id.
+
+    returns: Candidate
+    '''
+    for attempt in range(CANDIDATE_WRITE_ATTEMPTS):
+        upsert = (
+            dialect_insert(Candidate)
+            .values(unique_id=secrets.token_hex(3), **candidate_data)
+            .on_conflict_do_update(index_elements=["project_id", "github_username"], set_=candidate_data)
+            .returning(Candidate)
+        )
+        try:
+            candidate = (await session.scalars(upsert, execution_options={"populate_existing": True})).one()
+            await session.commit()
+            return candidate
+        except IntegrityError:
+            await session.rollback()
+    raise HTTPException(409, "Could not save the candidate; please retry.")
 
 # Main candidate analysis endpoint
 @app.post("/projects/{project_id}/summarize", response_model=Candidate)
@@ -308,7 +593,7 @@ async def analyze_candidate(
     username: str = Form(...),
     resume_file: UploadFile = File(...),
     linkedin_file: Optional[UploadFile] = File(None),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     
     '''
@@ -318,7 +603,7 @@ async def analyze_candidate(
         username (str): GitHub username or URL.
         resume_file (UploadFile): Uploaded resume PDF file.
         linkedin_file (Optional[UploadFile]): Uploaded LinkedIn PDF file.
-        session (Session): Database session.
+        session (AsyncSession): Database session.
     returns: Candidate
     '''
 
@@ -336,144 +621,170 @@ async def analyze_candidate(
         raise HTTPException(status_code=400, detail="GitHub username is required.")
 
     # Fetch project
-    project = session.get(Project, project_id)
+    project = await session.get(Project, project_id)
     if not project: 
         raise HTTPException(404, "Project not found")
     
-    # Parse Resume & LinkedIn
-    resume_bytes = await resume_file.read()
-    resume_text = parse_pdf_resume(resume_bytes)
-    if not resume_text: 
-        raise HTTPException(400, "Empty/Invalid Resume PDF")
-    
-    linkedin_text = ""
+    # Stage the uploads on disk straight from their spooled temp files, then parse Resume & LinkedIn
+    # from there in the PDF pool while GitHub is fetched; the PDF bytes are never held in this process
+    staging_prefix = os.path.join(REPORTS_DIR, f".upload-{secrets.token_hex(8)}")
+    uploads = {"resume.pdf": resume_file}
     if linkedin_file:
-        linkedin_text = parse_pdf_resume(await linkedin_file.read())
-
-    # 2. Fetch GitHub Data
-    profile_task = github_client.get_user_profile(username)
-    repos_task = github_client.get_user_repos(username)
-    profile, repos = await asyncio.gather(profile_task, repos_task)
-    if not profile: raise HTTPException(404, "GitHub user not found")
-    
-    # Fetch READMEs for deeper context
-    top_repos = sorted(repos, key=lambda r: r.get('stargazers_count', 0), reverse=True)[:5]
-    readme_tasks = [github_client.get_readme_content(username, repo['name']) for repo in top_repos]
-    readmes_list = await asyncio.gather(*readme_tasks)
-    readmes = {repo['name']: content for repo, content in zip(top_repos, readmes_list) if content}
-    
-    # Calculate Quantitative Scores
-    # A. Technical Score (40%)
-    tech_score, matches, missing = calculate_technical_match(resume_text + " " + json.dumps(repos), project.job_description)
-    
-    # B. Experience Score (25%)
-    exp_score = calculate_experience_score(resume_text, project.job_description)
-    
-    # C. Complexity Score (20%)
-    comp_score = calculate_complexity_score(repos)
-    
-    # D. Domain Score (15%)
-    dom_score = calculate_domain_relevance(project.job_description, resume_text)
-
-    # Pack scores for the LLM
-    quantitative_data = {
-        "technical_skills": tech_score,
-        "experience_level": exp_score,
-        "project_complexity": comp_score,
-        "domain_relevance": dom_score,
-        "details": {
-            "matched_skills": matches,
-            "missing_skills": missing
+        uploads["linkedin.pdf"] = linkedin_file
+    staged = {name: f"{staging_prefix}-{name}" for name in uploads}
+    # Staged files that weren't moved into the candidate folder are removed however the request ends,
+    # since REPORTS_DIR is served publicly
+    try:
+        sizes = dict(zip(uploads, await asyncio.gather(
+            *(save_upload_async(upload, staged[name]) for name, upload in uploads.items())
+        )))
+        # A LinkedIn upload identical to the resume (a common slip) adds nothing, so it is treated as absent
+        has_linkedin = sizes.get("linkedin.pdf", 0) > 0 and not (
+            sizes["linkedin.pdf"] == sizes["resume.pdf"]
+            and await asyncio.to_thread(filecmp.cmp, staged["resume.pdf"], staged["linkedin.pdf"], shallow=False)
+        )
+        resume_text, linkedin_text, (profile, repos, top_repos, readmes) = await asyncio.gather(
+            parse_pdf_resume_async(staged["resume.pdf"]),
+            parse_pdf_resume_async(staged["linkedin.pdf"]) if has_linkedin else asyncio.sleep(0, result=""),
+            fetch_github_data(username)
+        )
+        if not resume_text: 
+            raise HTTPException(400, "Empty/Invalid Resume PDF")
+        if not profile: raise HTTPException(404, "GitHub user not found")
+    
+        # Calculate Quantitative Scores
+        # Tokenize each text once and share the result across analyzers; parsing and scoring
+        # run in worker threads so the event loop keeps serving other requests meanwhile
+        jd_doc, resume_doc, profile_doc = await asyncio.gather(
+            asyncio.to_thread(parse, project.job_description),
+            asyncio.to_thread(parse, resume_text),
+            asyncio.to_thread(parse, resume_text + " " + repos_text(repos))
+        )
+        # Read (or rebuilt) first, since the session stays on the event loop
+        idf = await project_idf(session)
+
+        (tech_score, matches, missing), exp_score, comp_score, dom_score = await asyncio.gather(
+            # A. Technical Score (40%)
+            asyncio.to_thread(calculate_technical_match, profile_doc, jd_doc),
+            # B. Experience Score (25%)
+            asyncio.to_thread(calculate_experience_score, resume_doc, jd_doc),
+            # C. Complexity Score (20%)
+            asyncio.to_thread(calculate_complexity_score, repos),
+            # D. Domain Score (15%), weighting JD terms by TF-IDF over all project JDs
+            asyncio.to_thread(calculate_domain_relevance, jd_doc, resume_doc, idf)
+        )
+
+        # Pack scores for the LLM
+        quantitative_data = {
+            "technical_skills": tech_score,
+            "experience_level": exp_score,
+            "project_complexity": comp_score,
+            "domain_relevance": dom_score,
+            "details": {
+                "matched_skills": matches,
+                "missing_skills": missing
+            }
         }
-    }
-
-    # AI Analysis & Summary
-    print(" Running AI Analysis")
-    ai_result = await llm_client.generate_summary_from_github_data(
-        profile, 
-        top_repos, 
-        readmes, 
-        project.job_description, 
-        resume_text, 
-        linkedin_text, 
-        quantitative_data
-    )
-    
-    if "error" in ai_result: raise HTTPException(500, ai_result["error"])
 
-    # 5. Calculate final hybrid score
-    llm_adjustment = ai_result.get("llm_adjustment", 0)
-    
-    scoring_result = calculate_hybrid_score(
-        tech_score, exp_score, comp_score, dom_score, llm_adjustment
-    )
-    
-    # Generate audit trail
-    audit_trail = generate_audit_trail(
-        {"tech": tech_score, "exp": exp_score, "comp": comp_score, "dom": dom_score},
-        {"adjustment": llm_adjustment, "reason": ai_result.get("adjustment_reasoning")}
-    )
-
-    # Save to DB
-    # Check for existing candidate to update
-    existing = session.exec(select(Candidate).where(Candidate.project_id == project_id, Candidate.github_username == username)).first()
-    
-    # Extract evidence lists safely
-    evidence = ai_result.get("breakdown", {})
-    
-    candidate_data = {
-        "name": username,
-        "github_username": username,
-        "report_file_path": "placeholder",
-        "project_id": project_id,
+        # AI Analysis & Summary
+        # Projects created with a summary of an over-long JD send that instead of a truncated JD
+        logger.info("Running AI Analysis for %s", username)
+        llm_inputs = dict(
+            profile=profile,
+            repos=top_repos,
+            readmes=readmes,
+            job_description=project.jd_summary or project.job_description,
+            resume_text=resume_text,
+            linkedin_text=linkedin_text,
+            quantitative_scores=quantitative_data,
+            # Semantic cache key inputs; clients without that cache ignore them
+            job_embedding=np.frombuffer(project.jd_embedding, dtype=np.float32) if project.jd_embedding else None,
+            project_id=project_id
+        )
+        if model_pool:
+            ai_result = await model_pool.run_all(**llm_inputs)
+        else:
+            ai_result = await llm_client.generate_summary_from_github_data(**llm_inputs)
+    
+        if "error" in ai_result: raise HTTPException(500, ai_result["error"])
+
+        # Keep the uploaded PDFs next to the report (the download endpoint can append them), replacing
+        # the previous run's only now that there is a new report to match; staged files are on the
+        # same filesystem, so this is a rename rather than a copy
+        folder = os.path.join(REPORTS_DIR, f"{username}_{project_id}")
+        os.makedirs(folder, exist_ok=True)
+        os.replace(staged["resume.pdf"], os.path.join(folder, "resume.pdf"))
+        if has_linkedin:
+            os.replace(staged["linkedin.pdf"], os.path.join(folder, "linkedin.pdf"))
+        else:
+            # An earlier run's LinkedIn no longer matches this report
+            discard_files([os.path.join(folder, "linkedin.pdf")])
+
+        # 5. Calculate final hybrid score
+        llm_adjustment = ai_result.get("llm_adjustment", 0)
+    
+        scoring_result = calculate_hybrid_score(
+            tech_score, exp_score, comp_score, dom_score, llm_adjustment
+        )
+    
+        # Generate audit trail
+        audit_trail = generate_audit_trail(
+            {"tech": tech_score, "exp": exp_score, "comp": comp_score, "dom": dom_score},
+            {"adjustment": llm_adjustment, "reason": ai_result.get("adjustment_reasoning")}
+        )
+
+        # Save to DB
+        # Extract evidence lists safely
+        evidence = ai_result.get("breakdown", {})
+    
+        candidate_data = {
+            "name": username,
+            "github_username": username,
+            "report_file_path": "placeholder",
+            "project_id": project_id,
         
-        # Metrics
-        "technical_skills_score": tech_score,
-        "experience_level_score": exp_score,
-        "project_complexity_score": comp_score,
-        "domain_relevance_score": dom_score,
+            # Metrics
+            "technical_skills_score": tech_score,
+            "experience_level_score": exp_score,
+            "project_complexity_score": comp_score,
+            "domain_relevance_score": dom_score,
         
-        # Final Scores
-        "base_score": scoring_result["base_score"],
-        "llm_adjustment": llm_adjustment,
-        "final_score": scoring_result["final_score"],
+            # Final Scores
+            "base_score": scoring_result["base_score"],
+            "llm_adjustment": llm_adjustment,
+            "final_score": scoring_result["final_score"],
         
-        # Evidence & Audit
-        "confidence_level": scoring_result["confidence_level"],
-        "confidence_percentage": scoring_result["confidence_percentage"],
-        "strong_evidence": evidence.get("strong_evidence", []),
-        "weak_evidence": evidence.get("weak_evidence", []),
-        "missing_skills": evidence.get("missing_skills", []),
-        "red_flags": evidence.get("red_flags", []),
-        "audit_trail": audit_trail
-    }
-
-    # Save full JSON report to file for the frontend to view details (Summary, Interview Questions)
-    full_report = {
-        **candidate_data,
-        "summary": ai_result.get("summary"),
-        "interview_questions": ai_result.get("interview_questions")
-    }
-    
-    # File Saving Logic
-    folder = os.path.join(REPORTS_DIR, f"{username}_{project_id}")
-    os.makedirs(folder, exist_ok=True)
-    report_path = os.path.join(folder, "report.json")
-    with open(report_path, "w") as f: json.dump(full_report, f, indent=2)
-    
-    candidate_data["report_file_path"] = report_path # Update path
+            # Evidence & Audit
+            "confidence_level": scoring_result["confidence_level"],
+            "confidence_percentage": scoring_result["confidence_percentage"],
+            "strong_evidence": evidence.get("strong_evidence", []),
+            "weak_evidence": evidence.get("weak_evidence", []),
+            "missing_skills": evidence.get("missing_skills", []),
+            "red_flags": evidence.get("red_flags", []),
+            "audit_trail": audit_trail
+        }
+
+        # Save full JSON report to file for the frontend to view details (Summary, Interview Questions)
+        full_report = {
+            **candidate_data,
+            "summary": ai_result.get("summary"),
+            "interview_questions": ai_result.get("interview_questions")
+        }
     
-    if existing:
-        for key, value in candidate_data.items():
-            setattr(existing, key, value)
-        session.add(existing)
-        session.commit()
-        session.refresh(existing)
-        return existing
-    else:
-        unique_id = secrets.token_hex(3)
-        new_cand = Candidate(unique_id=unique_id, **candidate_data)
-        session.add(new_cand)
-        session.commit()
-        session.refresh(new_cand)
-        return new_cand
\ No newline at end of file
+        # File Saving Logic
+        report_path = os.path.join(folder, "report.json")
+        # Compact JSON, since only the report view reads it
+        report_bytes = orjson.dumps(full_report)
+    
+        candidate_data["report_file_path"] = report_path # Update path
+    
+        # The report file is written while the candidate row is saved
+        candidate, _ = await asyncio.gather(
+            save_candidate(session, candidate_data),
+            write_file_async(report_path, report_bytes)
+        )
+        # Previously generated download PDFs show the old report
+        discard_files(glob.glob(os.path.join(REPORTS_DIR, REPORT_PDF_CACHE_DIRNAME, f"{candidate.id}-*.pdf")))
+        return candidate
+    finally:
+        discard_files(staged.values())
@@ -0,0 +1,28 @@
+"""
+Optional ahead-of-time build of the scoring analyzers.
+
+Compiles the pure-Python modules in app/analysis to C extensions with mypyc,
+removing interpreter dispatch from the per-candidate scoring path. Import
+paths do not change, and without the build the plain .py modules are used:
+
+    pip install mypy
+    python setup.py build_ext --inplace
+"""
+from setuptools import setup
+from mypyc.build import mypycify
+
+ANALYSIS_MODULES = [
+    "app/analysis/patterns.py",
+    "app/analysis/scoring_engine.py",
+    "app/analysis/github_metrics.py",
+    "app/analysis/experience_calculator.py",
+    "app/analysis/domain_analyzer.py",
+    "app/analysis/skill_extractor.py",
+    "app/analysis/document.py",
+]
+
+setup(
+    name="ai-candidate-screener-analysis",
+    packages=[],
+    ext_modules=mypycify(ANALYSIS_MODULES, opt_level="3"),
+)
@@ -0,0 +1,84 @@
+"""
+Pins the quantitative scores to the values the original (pre-optimization) analyzers produced
+for the same inputs, so a faster implementation can't silently change a candidate's score.
+"""
+import pytest
+from app.analysis.document import parse
+from app.analysis.domain_analyzer import calculate_domain_relevance
+from app.analysis.github_metrics import calculate_complexity_score
+from app.analysis.scoring_engine import calculate_hybrid_score
+from app.analysis.skill_extractor import calculate_technical_match, extract_skills
+
+REPOS = [
+    {"name": "big", "size": 25000, "stargazers_count": 340, "language": "Python", "description": "A large service", "has_wiki": True, "fork": False},
+    {"name": "mid", "size": 4000, "stargazers_count": 42, "language": "Go", "description": "", "has_pages": True, "fork": False},
+    {"name": "fork", "size": 500, "stargazers_count": 3, "language": None, "description": "forked", "fork": True},
+    {"name": "edge", "size": 10000, "stargazers_count": 100, "language": "Rust", "description": None, "fork": False},
+    {"name": "bare"},
+]
+
+JD = (
+    "We are hiring a Senior Backend Engineer. You will build Python microservices with FastAPI and Django, "
+    "deploy them with Docker and Kubernetes on AWS, and maintain PostgreSQL and Redis. Experience with "
+    "machine learning pipelines, CI/CD and REST API design is a plus. Payments platform experience, "
+    "fraud detection and payments compliance are valued; the platform handles payments at scale."
+)
+RESUME = (
+    "Backend developer with 6 years building payments systems in Python and Go. Built fraud detection "
+    "services on AWS using Docker, maintained PostgreSQL clusters, designed REST API contracts, "
+    "set up CI/CD with GitHub Actions. Familiar with React and node.js."
+)
+
+def test_complexity_score():
+    assert calculate_complexity_score(REPOS) == 54
+    assert [calculate_complexity_score([repo]) for repo in REPOS] == [100, 70, 10, 60, 30]
+    assert calculate_complexity_score([]) == 0
+
+@pytest.mark.parametrize("scores, expected", [
+    ((80, 60, 70, 50, 0), (68, 68, "High", 0.95)),
+    ((80, 60, 70, 50, 15), (68, 83, "Medium", 0.75)),
+    ((100, 100, 100, 100, 20), (100, 100, "High", 0.95)),
+    ((0, 0, 0, 0, -20), (0, 0, "High", 0.95)),
+    ((55, 40, 73, 12, -9), (48, 39, "High", 0.95)),
+    ((90, 90, 90, 90, -25), (90, 65, "Low", 0.5)),
+    ((33, 67, 81, 29, 7), (50, 57, "High", 0.95)),
+])
+def test_hybrid_score(scores, expected):
+    result = calculate_hybrid_score(*scores)
+    assert (result["base_score"], result["final_score"], result["confidence_level"], result["confidence_percentage"]) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    (JD, {"aws", "django", "docker", "fastapi", "kubernetes", "machine learning", "postgresql", "python", "rest api"}),
+    (RESUME, {"aws", "docker", "postgresql", "python", "react", "rest api"}),
+    ("", set()),
+    # Skills the character cleanup alters never match; multi-word skills match inside longer words
+    ("ci/cd, CI/CD and ci cd; scikit-learn; deep learnings; xmachine learningy; restful rest apis",
+     {"deep learning", "machine learning", "rest api"}),
+    ("Java\nJavaScript\tC++ node.js node.js. redis. Redis GraphQL, golang pythonic python3 Python",
+     {"c++", "graphql", "java", "javascript", "node.js", "python", "redis"}),
+    ("TYPESCRIPT/React-Native vue.js spring-boot sql;mysql mongodb",
+     {"mongodb", "mysql", "react", "spring", "sql", "typescript"}),
+])
+def test_extract_skills(text, expected):
+    assert extract_skills(text) == expected
+    assert parse(text).skills == expected
+
+def test_technical_match():
+    score, matches, missing = calculate_technical_match(parse(RESUME), parse(JD))
+    assert score == 55
+    assert sorted(matches) == ["aws", "docker", "postgresql", "python", "rest api"]
+    assert sorted(missing) == ["django", "fastapi", "kubernetes", "machine learning"]
+    assert calculate_technical_match(parse(RESUME), parse("nothing here")) == (0, [], [])
+
+@pytest.mark.parametrize("jd, candidate, expected", [
+    (JD, RESUME, 52),
+    (RESUME, JD, 60),
+    (JD, "", 0),
+    ("", RESUME, 0),
+    ("tiny words only", RESUME, 0),
+    # Capitalized words at the start of a line still count as keywords
+    ("Payments platform\nKafka pipelines for Payments\nFraud detection with Kafka\nStripe integrations",
+     "Built Kafka consumers.\nPayments and Fraud work at Stripe", 75),
+])
+def test_domain_relevance(jd, candidate, expected):
+    assert calculate_domain_relevance(parse(jd), parse(candidate)) == expected
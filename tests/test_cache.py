@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from app import cache
+
+def test_single_flight_runs_concurrent_calls_once():
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"summary": "ok"}
+
+    async def run():
+        return await asyncio.gather(*(cache.single_flight("sf-once", call) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(result == {"summary": "ok"} for result in results)
+    # Waiters get their own copy, so mutating one result can't change another's
+    assert len({id(result) for result in results}) == 5
+    assert "sf-once" not in cache._INFLIGHT
+
+def test_single_flight_shares_errors_and_then_retries():
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("model down")
+
+    async def run():
+        return await asyncio.gather(*(cache.single_flight("sf-error", failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    # A finished call isn't reused; the next caller runs it again
+    with pytest.raises(ValueError):
+        asyncio.run(cache.single_flight("sf-error", failing))
+    assert calls == 2
+
+def test_single_flight_waiter_takes_over_after_cancellation():
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    async def run():
+        first = asyncio.create_task(cache.single_flight("sf-cancel", call))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.single_flight("sf-cancel", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,42 @@
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import main
+from app.models import Candidate, Project
+
+def candidate_data(project_id: int, username: str, final_score: int) -> dict:
+    return {
+        "name": username.title(),
+        "github_username": username,
+        "project_id": project_id,
+        "report_file_path": f"/reports/{username}_{project_id}/report.json",
+        "final_score": final_score,
+        "strong_evidence": ["Built APIs"],
+    }
+
+def test_save_candidate_upserts_per_project_and_username(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            first_project, second_project = Project(name="A", job_description="Python"), Project(name="B", job_description="Go")
+            session.add_all([first_project, second_project])
+            await session.commit()
+
+            first = await main.save_candidate(session, candidate_data(first_project.id, "octo", 70))
+            rescreen = await main.save_candidate(session, candidate_data(first_project.id, "octo", 85))
+            elsewhere = await main.save_candidate(session, candidate_data(second_project.id, "octo", 40))
+            rows = (await session.exec(select(Candidate).order_by(Candidate.id))).all()
+        await engine.dispose()
+        return first, rescreen, elsewhere, rows
+
+    first, rescreen, elsewhere, rows = asyncio.run(run())
+    # A re-screen updates the row in place and keeps its public id
+    assert (rescreen.id, rescreen.unique_id) == (first.id, first.unique_id)
+    assert rescreen.final_score == 85
+    assert rescreen.strong_evidence == ["Built APIs"]
+    # The same username in another project is another candidate
+    assert elsewhere.id != first.id and elsewhere.unique_id != first.unique_id
+    assert [(row.project_id, row.final_score) for row in rows] == [(first.project_id, 85), (elsewhere.project_id, 40)]
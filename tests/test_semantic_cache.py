@@ -0,0 +1,89 @@
+import asyncio
+import os
+import numpy as np
+import pytest
+from app.services import semantic_cache
+from app.services.semantic_cache import KEY_DIM, SemanticCache, cache_scope, embed
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_ENABLED", True)
+
+def unit_vector(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).standard_normal(KEY_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_embed_is_unit_length_and_similar_for_near_duplicates():
+    a = embed("Senior Python engineer, payments", "Python developer, 6 years", "- Repo: api | Lang: Python")
+    b = embed("Senior Python engineer, payments team", "Python developer, 6 years", "- Repo: api | Lang: Python")
+    c = embed("Frontend designer", "Illustrator and Figma", "- Repo: site | Lang: CSS")
+    assert a.shape == (KEY_DIM,)
+    assert np.linalg.norm(a) == pytest.approx(1.0, abs=1e-5)
+    assert float(a @ b) > float(a @ c)
+
+def test_cache_scope_is_exact():
+    scores = {"technical_skills": 80, "details": {"matched_skills": ["python"]}}
+    assert cache_scope("octo", 1, scores) == cache_scope("octo", 1, dict(reversed(list(scores.items()))))
+    assert cache_scope("octo", 1, scores) != cache_scope("octo", 2, scores)
+    assert cache_scope("octo", 1, scores) != cache_scope("octo", 1, {**scores, "technical_skills": 81})
+    assert cache_scope("octo", 1, scores) != cache_scope("other", 1, scores)
+
+def test_lookup_only_matches_within_scope(tmp_path):
+    async def run():
+        cache = SemanticCache(str(tmp_path))
+        await cache.add(unit_vector(1), "a", {"summary": "for a"})
+        hit = await cache.lookup(unit_vector(1), "a")
+        other_scope = await cache.lookup(unit_vector(1), "b")
+        dissimilar = await cache.lookup(unit_vector(2), "a")
+        return hit, other_scope, dissimilar
+
+    hit, other_scope, dissimilar = asyncio.run(run())
+    assert hit == {"summary": "for a", "model_source": "SemanticCache"}
+    assert other_scope is None
+    assert dissimilar is None
+
+def test_oldest_entries_are_evicted(tmp_path):
+    async def run():
+        cache = SemanticCache(str(tmp_path), max_entries=2)
+        for i in range(3):
+            await cache.add(unit_vector(i), "a", {"n": i})
+        return cache, [await cache.lookup(unit_vector(i), "a") for i in range(3)]
+
+    cache, results = asyncio.run(run())
+    assert results[0] is None
+    assert [result["n"] for result in results[1:]] == [1, 2]
+    assert len(os.listdir(tmp_path / "reports")) == 2
+    assert list(cache._rows["a"]) == [1, 0]
+
+def test_log_is_appended_compacted_and_reloaded(tmp_path):
+    async def run():
+        cache = SemanticCache(str(tmp_path), max_entries=2)
+        for i in range(4):
+            await cache.add(unit_vector(i), f"user{i % 2}", {"n": i})
+        logged_rows = os.path.getsize(tmp_path / "vectors.f32") // (KEY_DIM * 4)
+        # A fifth add takes the log past twice the limit, so it is rewritten with the live entries
+        await cache.add(unit_vector(4), "user0", {"n": 4})
+        compacted_rows = os.path.getsize(tmp_path / "vectors.f32") // (KEY_DIM * 4)
+        reloaded = SemanticCache(str(tmp_path), max_entries=2)
+        return logged_rows, compacted_rows, [await reloaded.lookup(unit_vector(i), f"user{i % 2}") for i in range(5)]
+
+    logged_rows, compacted_rows, results = asyncio.run(run())
+    assert logged_rows == 4
+    assert compacted_rows == 2
+    assert [result and result["n"] for result in results] == [None, None, None, 3, 4]
+
+def test_torn_log_tail_is_dropped_on_load(tmp_path):
+    async def run():
+        cache = SemanticCache(str(tmp_path))
+        await cache.add(unit_vector(1), "a", {"n": 1})
+        with open(tmp_path / "vectors.f32", "ab") as f:
+            f.write(b"\x00\x01")
+        with open(tmp_path / "entries.jsonl", "ab") as f:
+            f.write(b'{"id": "trunc')
+        reloaded = SemanticCache(str(tmp_path))
+        await reloaded.add(unit_vector(2), "a", {"n": 2})
+        again = SemanticCache(str(tmp_path))
+        return [await again.lookup(unit_vector(i), "a") for i in (1, 2)]
+
+    results = asyncio.run(run())
+    assert [result["n"] for result in results] == [1, 2]